@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+"""Usage:
+    converters [--copies=<n>] [--repeat=<n>] [--baseline=<path>] [--threshold=<pct>] [--save-baseline] [<benchmark>...]
+    converters --list
+
+Time the converters over the records in test_data, replicated to make larger
+synthetic inputs. For each benchmark report records/sec, the median and 99th
+percentile latency per record, and the peak resident set size of the process
+that ran it. Each benchmark is run several times, and the best of each
+measurement is reported.
+
+If a baseline file exists, compare against it and exit with a non-zero status
+when a benchmark's throughput drops, or its p99 latency or peak RSS grows, by
+more than the threshold. Baselines depend on the machine they were recorded
+on, so record one locally with --save-baseline before comparing.
+
+Options:
+  -h --help            Show this screen.
+  --list               List the available benchmarks.
+  --copies=<n>         Number of copies of the test records to convert.
+                       [default: 100]
+  --repeat=<n>         Number of runs per benchmark. [default: 3]
+  --baseline=<path>    Baseline file. [default: benchmarks/baseline.json]
+  --threshold=<pct>    Allowed regression, in percent. [default: 20]
+  --save-baseline      Write the results to the baseline file instead of
+                       comparing against it.
+"""
+
+import io, json, multiprocessing, os, resource, sys, time
+from docopt import docopt
+from pymarc import MARCReader
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from metadata_converters import iter_marcxml_records, MarcXmlToOpenGraph, \
+    MarcXmlToSchemaDotOrg, MarcXmlToTwitterCard, NTriplesSink, \
+    SocSciMapsMarcXmlToDc, SocSciMapsMarcXmlToEDM
+
+TEST_DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'test_data'
+)
+
+# digital and print records for the social scientist maps converters.
+SOC_SCI_MAPS_PAIRS = (('7641168', '3451312'), ('5999566', '7368094'))
+
+def build_marcxml_collection(copies):
+    """Concatenate the records from every MARCXML file in test_data into one
+    collection, repeated the given number of times.
+
+    Returns:
+        bytes
+    """
+    records = []
+    for filename in sorted(os.listdir(TEST_DATA)):
+        if filename.endswith('.xml'):
+            with open(os.path.join(TEST_DATA, filename), 'rb') as f:
+                data = f.read()
+            start = data.index(b'<record')
+            end = data.rindex(b'</record>') + len(b'</record>')
+            records.append(data[start:end])
+    return b''.join((
+        b'<?xml version="1.0" encoding="UTF-8"?>',
+        b'<collection xmlns="http://www.loc.gov/MARC21/slim">',
+        b''.join(records) * copies,
+        b'</collection>'
+    ))
+
+def build_mrc_collection(copies):
+    """Concatenate every binary MARC file in test_data, repeated the given
+    number of times.
+
+    Returns:
+        bytes
+    """
+    data = []
+    for filename in sorted(os.listdir(TEST_DATA)):
+        if filename.endswith('.mrc'):
+            with open(os.path.join(TEST_DATA, filename), 'rb') as f:
+                data.append(f.read())
+    return b''.join(data) * copies
+
+def read_mrc(identifier):
+    with open(os.path.join(TEST_DATA, '{}.mrc'.format(identifier)), 'rb') as fh:
+        return next(MARCReader(fh))
+
+def iter_marcxml(copies):
+    return iter_marcxml_records(io.BytesIO(build_marcxml_collection(copies)))
+
+def iter_mrc(copies):
+    return (r for r in MARCReader(io.BytesIO(build_mrc_collection(copies))) if r is not None)
+
+def iter_soc_sci_maps_pairs(copies):
+    """Yield (digital record, print record, noid) tuples, giving each copy its
+    own noid so that EDM output doesn't collapse into a single item."""
+    pairs = [(read_mrc(d), read_mrc(p)) for d, p in SOC_SCI_MAPS_PAIRS]
+    for i in range(copies):
+        for n, (digital_record, print_record) in enumerate(pairs):
+            yield digital_record, print_record, 'b{:07d}{}'.format(i, n)
+
+def build_edm(digital_record, print_record, noid):
+    """Build the EDM for one map."""
+    edm = SocSciMapsMarcXmlToEDM(digital_record, print_record, noid, [])
+    edm.build_item_triples()
+    return edm
+
+def stream_edm(digital_record, print_record, noid):
+    """Write the EDM for one map straight to N-Triples."""
+    out = io.StringIO()
+    SocSciMapsMarcXmlToEDM(
+        digital_record, print_record, noid, [], NTriplesSink(out)
+    ).build_item_triples()
+    return out.getvalue()
+
+BENCHMARKS = {
+    'schemadotorg_marcxml': (iter_marcxml, lambda r: MarcXmlToSchemaDotOrg(r)()),
+    'schemadotorg_mrc':     (iter_mrc,     lambda r: MarcXmlToSchemaDotOrg(r)()),
+    'opengraph':            (iter_marcxml, lambda r: str(MarcXmlToOpenGraph(r))),
+    'twittercard':          (iter_marcxml, lambda r: str(MarcXmlToTwitterCard(r))),
+    'socscimaps_dc':        (iter_soc_sci_maps_pairs, lambda a: str(SocSciMapsMarcXmlToDc(*a))),
+    'socscimaps_edm':       (iter_soc_sci_maps_pairs, lambda a: build_edm(*a)),
+    'edm_turtle':           (iter_soc_sci_maps_pairs, lambda a: build_edm(*a).triples()),
+    'edm_turtle_rdflib':    (iter_soc_sci_maps_pairs,
+                             lambda a: build_edm(*a).graph.serialize(format='turtle', base='ark:/61001/')),
+    'edm_ntriples':         (iter_soc_sci_maps_pairs,
+                             lambda a: build_edm(*a).graph.serialize(format='nt')),
+    'edm_ntriples_stream':  (iter_soc_sci_maps_pairs, lambda a: stream_edm(*a))
+}
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))]
+
+def run_benchmark(name, copies):
+    """Run one benchmark and measure it.
+
+    Returns:
+        dict: records, records_per_sec, p50 and p99 latency in milliseconds,
+            and peak_rss in kilobytes.
+    """
+    records, convert = BENCHMARKS[name]
+    latencies = []
+    start = previous = time.perf_counter()
+    for record in records(copies):
+        convert(record)
+        now = time.perf_counter()
+        latencies.append(now - previous)
+        previous = now
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'records': len(latencies),
+        'records_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 50) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+def _run_benchmark(args):
+    return run_benchmark(*args)
+
+def best_result(results):
+    """Combine several runs of a benchmark, keeping the best of each
+    measurement, so that one slow run on a busy machine isn't reported as a
+    regression.
+
+    Returns:
+        dict, as from run_benchmark()
+    """
+    return {
+        'records': results[0]['records'],
+        'records_per_sec': max(r['records_per_sec'] for r in results),
+        'p50': min(r['p50'] for r in results),
+        'p99': min(r['p99'] for r in results),
+        'peak_rss': min(r['peak_rss'] for r in results)
+    }
+
+def compare(result, baseline, threshold):
+    """Compare a result with its baseline.
+
+    Returns:
+        list: of str, one per measurement that regressed.
+    """
+    regressions = []
+    if result['records_per_sec'] < baseline['records_per_sec'] * (1 - threshold):
+        regressions.append('records/sec {:.0f} < {:.0f}'.format(
+            result['records_per_sec'], baseline['records_per_sec']))
+    for key, label in (('p99', 'p99 ms'), ('peak_rss', 'peak RSS KB')):
+        if result[key] > baseline[key] * (1 + threshold):
+            regressions.append('{} {:.2f} > {:.2f}'.format(
+                label, result[key], baseline[key]))
+    return regressions
+
+def main():
+    options = docopt(__doc__)
+
+    if options['--list']:
+        sys.stdout.write('\n'.join(BENCHMARKS) + '\n')
+        sys.exit()
+
+    names = options['<benchmark>'] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            sys.stderr.write('unknown benchmark: {}\n'.format(name))
+            sys.exit(2)
+    copies = int(options['--copies'])
+    repeat = int(options['--repeat'])
+    threshold = float(options['--threshold']) / 100
+
+    baseline = {}
+    if not options['--save-baseline'] and os.path.exists(options['--baseline']):
+        with open(options['--baseline']) as f:
+            baseline = json.load(f)
+
+    results = {}
+    failed = False
+    sys.stdout.write('{:<22} {:>8} {:>12} {:>9} {:>9} {:>12}\n'.format(
+        'benchmark', 'records', 'records/sec', 'p50 ms', 'p99 ms', 'peak RSS KB'))
+    for name in names:
+        # run each benchmark in a freshly spawned interpreter, so its peak
+        # RSS isn't inherited from this process or the benchmarks before it,
+        # as it would be in a forked child.
+        runs = []
+        for _ in range(repeat):
+            with multiprocessing.get_context('spawn').Pool(1, maxtasksperchild=1) as pool:
+                runs.append(pool.apply(_run_benchmark, ((name, copies),)))
+        result = best_result(runs)
+        results[name] = result
+        sys.stdout.write('{:<22} {:>8} {:>12.0f} {:>9.3f} {:>9.3f} {:>12}\n'.format(
+            name,
+            result['records'],
+            result['records_per_sec'],
+            result['p50'],
+            result['p99'],
+            result['peak_rss']
+        ))
+        if name in baseline:
+            for regression in compare(result, baseline[name], threshold):
+                sys.stdout.write('  REGRESSION: {}\n'.format(regression))
+                failed = True
+
+    if options['--save-baseline']:
+        with open(options['--baseline'], 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        sys.stdout.write('baseline written to {}\n'.format(options['--baseline']))
+    elif failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
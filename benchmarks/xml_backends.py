@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""Usage:
+    xml_backends [--copies=<n>] [--repeat=<n>]
+
+Compare the lxml and ElementTree parsing backends on a MARCXML collection
+built from test_data/VuFindExport.xml.
+
+Options:
+  --copies=<n>  Number of copies of VuFindExport.xml's records to put in the
+                collection. [default: 100]
+  --repeat=<n>  Number of timed runs per backend. The best run is
+                reported. [default: 3]
+"""
+
+import io, os, sys, time
+from docopt import docopt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from metadata_converters import classes
+from metadata_converters.classes import iter_marcxml_records, MarcXmlToSchemaDotOrg
+
+VUFIND_EXPORT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'test_data', 'VuFindExport.xml'
+)
+
+def build_collection(copies):
+    """Repeat the records in VuFindExport.xml to make a larger collection.
+
+    Returns:
+        bytes
+    """
+    with open(VUFIND_EXPORT, 'rb') as f:
+        data = f.read()
+    start = data.index(b'<record>')
+    end = data.rindex(b'</collection>')
+    return data[:start] + data[start:end] * copies + data[end:]
+
+def time_backend(name, collection, repeat):
+    """Parse and convert every record in the collection with one backend.
+
+    Returns:
+        tuple: the number of records and the best time in seconds, for
+            parsing alone and for parsing plus conversion to Schema.org.
+    """
+    classes.set_xml_backend(name)
+    parse_times = []
+    convert_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        n = sum(1 for _ in iter_marcxml_records(io.BytesIO(collection)))
+        parse_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for record in iter_marcxml_records(io.BytesIO(collection)):
+            MarcXmlToSchemaDotOrg(record)()
+        convert_times.append(time.perf_counter() - start)
+    return n, min(parse_times), min(convert_times)
+
+def main():
+    options = docopt(__doc__)
+    collection = build_collection(int(options['--copies']))
+    repeat = int(options['--repeat'])
+
+    sys.stdout.write('{:.1f} MB of MARCXML\n'.format(len(collection) / 1e6))
+    results = {}
+    for name in ('etree', 'lxml'):
+        try:
+            results[name] = time_backend(name, collection, repeat)
+        except ImportError:
+            sys.stdout.write('{}: not installed\n'.format(name))
+            continue
+        n, parse, convert = results[name]
+        sys.stdout.write('{}: parse {:.0f} records/sec, parse and convert {:.0f} records/sec\n'.format(
+            name,
+            n / parse,
+            n / convert
+        ))
+    if len(results) == 2:
+        sys.stdout.write('lxml speedup: parse {:.2f}x, parse and convert {:.2f}x\n'.format(
+            results['etree'][1] / results['lxml'][1],
+            results['etree'][2] / results['lxml'][2]
+        ))
+    classes.set_xml_backend()
+
+if __name__ == "__main__":
+    main()
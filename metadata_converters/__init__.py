@@ -1 +1 @@
-from .classes import MarcXmlConverter, MarcXmlToOpenGraph, MarcXmlToSchemaDotOrg, MarcXmlToTwitterCard, SocSciMapsMarcXmlToDc, SocSciMapsMarcXmlToEDM
+from .classes import CollectionCache, EDMCollectionWriter, FingerprintManifest, Fixity, FixityCache, iter_marcxml_records, MarcXmlConverter, MarcXmlToOpenGraph, MarcXmlToSchemaDotOrg, MarcXmlToTwitterCard, NTriplesSink, SocSciMapsMarcXmlToDc, SocSciMapsMarcXmlToEDM, TermCache
@@ -1,8 +1,11 @@
-import datetime, getpass, hashlib, jinja2, json, magic, os, \
-       pymarc, random, re, string, sys
+import collections, contextlib, datetime, functools, getpass, hashlib, io, \
+       jinja2, json, magic, os, pymarc, random, re, sqlite3, string, struct, \
+       sys, tempfile, threading
 import xml.etree.ElementTree as ElementTree
 
-from rdflib import Graph, Literal, Namespace, URIRef
+from concurrent.futures import ThreadPoolExecutor
+
+from rdflib import BNode, Graph, Literal, Namespace, URIRef
 from rdflib.namespace import RDF, DC, DCTERMS, XSD
 from rdflib.plugins.sparql import prepareQuery
 
@@ -20,6 +23,27 @@ PREMIS2 = Namespace('http://www.loc.gov/premis/rdf/v1#')
 PREMIS3 = Namespace('http://www.loc.gov/premis/rdf/v3/')
 VRA = Namespace('http://purl.org/vra/')
 
+EDM_PREFIXES = (('bf', BF), ('dc', DC), ('dcterms', DCTERMS), ('edm', EDM),
+                ('erc', ERC), ('madsrdf', MADSRDF), ('mix', MIX), ('ore', ORE),
+                ('premis', PREMIS), ('premis2', PREMIS2), ('premis3', PREMIS3))
+
+MARCXML_CONTROLFIELD = '{http://www.loc.gov/MARC21/slim}controlfield'
+MARCXML_DATAFIELD = '{http://www.loc.gov/MARC21/slim}datafield'
+MARCXML_RECORD = '{http://www.loc.gov/MARC21/slim}record'
+MARCXML_SUBFIELD = '{http://www.loc.gov/MARC21/slim}subfield'
+
+
+@functools.lru_cache(maxsize=None)
+def compile_pattern(pattern):
+    """Compile a regular expression once and reuse it afterwards.
+
+    Args:
+        pattern (str): a regular expression, e.g. '[a-z]'
+
+    Returns:
+        re.Pattern
+    """
+    return re.compile(pattern)
 
 def remove_marc_punctuation(s):
     s = re.sub('^\s*', '', s)
@@ -165,6 +189,373 @@ class NoidManager():
         return noid not in self.list(path)
 
 
+NTRIPLES_STRING_ESCAPES = {
+    ord('\\'): '\\\\',
+    ord('"'): '\\"',
+    ord('\n'): '\\n',
+    ord('\r'): '\\r'
+}
+
+
+def ntriples_iri_escape(match):
+    return '\\u{:04X}'.format(ord(match.group(0)))
+
+
+def ntriples_term(term):
+    """Format an rdflib term for N-Triples or N-Quads.
+
+    Args:
+        term (URIRef, Literal or BNode)
+
+    Returns:
+        str, e.g. '<http://example.org/>' or '"Chicago"@en'
+    """
+    if isinstance(term, Literal):
+        s = '"{}"'.format(str(term).translate(NTRIPLES_STRING_ESCAPES))
+        if term.language:
+            return '{}@{}'.format(s, term.language)
+        elif term.datatype:
+            return '{}^^{}'.format(s, ntriples_term(term.datatype))
+        return s
+    elif isinstance(term, BNode):
+        return '_:{}'.format(term)
+    else:
+        return '<{}>'.format(
+            compile_pattern(r'[\x00-\x20<>"{}|^`\\]').sub(ntriples_iri_escape, str(term))
+        )
+
+
+NTRIPLES_UNESCAPES = {
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t'
+}
+
+
+def ntriples_unescape(match):
+    if match.group(1):
+        return chr(int(match.group(1)[1:], 16))
+    return NTRIPLES_UNESCAPES.get(match.group(2), match.group(2))
+
+
+def iter_ntriples(lines):
+    """Split lines of N-Triples into their subject, predicate and object,
+    without building rdflib terms. This is much faster than parsing with
+    rdflib, and it only needs memory for one line at a time. Blank lines and
+    comments are skipped.
+
+    Args:
+        lines: an iterable of str, e.g. a text file object.
+
+    Returns:
+        a generator of (subject, predicate, object) tuples of str, each
+        written as it is in N-Triples, e.g. '<http://example.org/>' or
+        '"Chicago"@en'.
+    """
+    line_pattern = compile_pattern(r'^\s*(\S+)\s+(\S+)\s+(.*?)\s*\.\s*$')
+    for line in lines:
+        if line.lstrip().startswith('#'):
+            continue
+        match = line_pattern.match(line)
+        if match:
+            yield match.groups()
+
+
+def ntriples_value(term):
+    """Get the value of a term written as N-Triples: the URI of a URI, or the
+    string of a literal without its language or datatype. Blank nodes are
+    returned as they are.
+
+    Args:
+        term (str): e.g. '<http://example.org/>' or '"Chicago"@en'
+
+    Returns:
+        str
+    """
+    if term.startswith('<'):
+        value = term[1:-1]
+    elif term.startswith('"'):
+        value = term[1:term.rindex('"')]
+    else:
+        return term
+    if '\\' not in value:
+        return value
+    return compile_pattern(r'\\(?:(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8})|(.))').sub(
+        ntriples_unescape, value)
+
+
+def relative_reference(uri, base):
+    """Write a URI relative to a base URI, if it can be resolved back to the
+    same URI.
+
+    The remainder after the base is only usable if a parser won't read it
+    as an absolute URI (a colon in its first segment), resolve it against
+    the base's authority instead of its path (a leading slash), or drop
+    parts of it (dot segments).
+
+    Returns:
+        str, or None if the URI has to be written in full.
+    """
+    if not base or not uri.startswith(base):
+        return None
+    relative = uri[len(base):]
+    if relative.startswith('/'):
+        return None
+    path = compile_pattern('[?#]').split(relative, 1)[0]
+    segments = path.split('/')
+    if ':' in segments[0] or '.' in segments or '..' in segments:
+        return None
+    return relative
+
+
+def write_turtle(graph, out, base=None):
+    """Write a graph as Turtle, for flat graphs like our EDM: subjects with
+    lists of predicates and objects, and no blank node nesting or RDF
+    lists. That lets us skip most of the work rdflib's Turtle serializer
+    does. Each term is formatted once and triples are grouped by subject in
+    a single pass over the graph. Subjects, predicates and objects are
+    sorted, so the output is deterministic.
+
+    Namespaces bound to the graph are written as prefixes when they are
+    used. URIs under base are written relative to it, where that resolves
+    back to the same URI.
+
+    Args:
+        graph (Graph)
+        out (file): a text file object.
+        base (str): optional, a base URI.
+    """
+    namespaces = {str(ns): prefix for prefix, ns in graph.namespaces()}
+    used = {}
+    labels = {}
+
+    def label(term):
+        try:
+            return labels[term]
+        except KeyError:
+            pass
+        if isinstance(term, Literal):
+            s = '"{}"'.format(str(term).translate(NTRIPLES_STRING_ESCAPES))
+            if term.language:
+                s = '{}@{}'.format(s, term.language)
+            elif term.datatype == XSD.integer and compile_pattern('^[+-]?[0-9]+$').match(term):
+                s = str(term)
+            elif term.datatype:
+                s = '{}^^{}'.format(s, label(term.datatype))
+        elif isinstance(term, BNode):
+            s = '_:{}'.format(term)
+        else:
+            uri = str(term)
+            ns = uri[:max(uri.rfind('#'), uri.rfind('/')) + 1]
+            if ns in namespaces and compile_pattern('^([A-Za-z0-9_][A-Za-z0-9_-]*)?$').match(uri[len(ns):]):
+                used[namespaces[ns]] = ns
+                s = '{}:{}'.format(namespaces[ns], uri[len(ns):])
+            else:
+                relative = relative_reference(uri, base)
+                s = ntriples_term(term if relative is None else URIRef(relative))
+        labels[term] = s
+        return s
+
+    subjects = {}
+    for s, p, o in graph:
+        subjects.setdefault(label(s), {}).setdefault(
+            'a' if p == RDF.type else label(p),
+            []
+        ).append(label(o))
+
+    if base:
+        out.write('@base <{}> .\n'.format(base))
+    for prefix in sorted(used):
+        out.write('@prefix {}: <{}> .\n'.format(prefix, used[prefix]))
+    out.write('\n')
+
+    for s in sorted(subjects):
+        predicates = subjects[s]
+        out.write('{} {} .\n\n'.format(
+            s,
+            ' ;\n    '.join(
+                '{} {}'.format(p, ',\n        '.join(sorted(predicates[p])))
+                for p in sorted(predicates, key=lambda p: (p != 'a', p))
+            )
+        ))
+
+
+def turtle(graph, base=None):
+    """Return a graph as Turtle. See write_turtle().
+
+    Returns:
+        str
+    """
+    out = io.StringIO()
+    write_turtle(graph, out, base)
+    return out.getvalue()
+
+
+class NTriplesSink:
+    """Write triples to a stream as N-Triples as soon as they are added,
+    instead of collecting them in an rdflib Graph. With a graph name, write
+    N-Quads instead.
+
+    The sink has the add() and bind() methods the EDM converters use on a
+    Graph, so it can be passed to any of them in place of one. Nothing is
+    kept in memory and duplicate triples are written as often as they are
+    added, which RDF stores treat as a single triple.
+    """
+
+    def __init__(self, out, graph_name=None):
+        """Initialize a sink.
+
+        Args:
+            out (file): a text file object.
+            graph_name (str): optional, a graph IRI to write N-Quads.
+        """
+        self.out = out
+        self.count = 0
+        if graph_name is None:
+            self.end = ' .\n'
+        else:
+            self.end = ' {} .\n'.format(ntriples_term(URIRef(graph_name)))
+
+    def add(self, triple):
+        """Write a triple.
+
+        Args:
+            triple (tuple): subject, predicate and object.
+        """
+        s, p, o = triple
+        self.out.write(
+            '{} {} {}{}'.format(ntriples_term(s), ntriples_term(p), ntriples_term(o), self.end)
+        )
+        self.count += 1
+
+    def bind(self, prefix, namespace, override=True):
+        """N-Triples don't use prefixes, so bindings are ignored."""
+        pass
+
+    def __len__(self):
+        return self.count
+
+
+class TermCache:
+    """Build rdflib terms once and share them.
+
+    Every item we convert builds the same terms again: the literal
+    'University of Chicago Library', license URIs, EDM classes and
+    properties. A cache hands back the term built the first time, so
+    identical terms are shared across items and graphs instead of being
+    allocated for each one.
+
+    A cache can be given a maximum size for terms that repeat within an
+    item but not across items, like page URIs; the least recently used
+    terms are evicted first. Counters report how many terms were built
+    (misses), how many allocations were saved (hits), evictions, and the
+    approximate memory held by the cached terms.
+    """
+
+    def __init__(self, maxsize=None):
+        """Initialize a cache.
+
+        Args:
+            maxsize (int): optional, the most terms to keep. By default the
+                cache is unbounded.
+        """
+        self.maxsize = maxsize
+        self.terms = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def _get(self, key, build):
+        try:
+            term = self.terms[key]
+        except KeyError:
+            self.misses += 1
+            term = self.terms[key] = build()
+            self.bytes += sys.getsizeof(term)
+            if self.maxsize is not None and len(self.terms) > self.maxsize:
+                _, evicted = self.terms.popitem(last=False)
+                self.bytes -= sys.getsizeof(evicted)
+                self.evictions += 1
+            return term
+        self.hits += 1
+        if self.maxsize is not None:
+            self.terms.move_to_end(key)
+        return term
+
+    def uri(self, value):
+        """Get a URIRef.
+
+        Args:
+            value (str): e.g. 'https://repository.lib.uchicago.edu/'
+
+        Returns:
+            URIRef
+        """
+        return self._get((URIRef, value), lambda: URIRef(value))
+
+    def term(self, namespace, name):
+        """Get a term from a namespace, e.g. term(EDM, 'ProvidedCHO') for
+        EDM.ProvidedCHO, without building a new URIRef on every lookup.
+
+        Returns:
+            URIRef
+        """
+        return self._get((Namespace, namespace, name), lambda: namespace[name])
+
+    def literal(self, value, datatype=None, lang=None):
+        """Get a Literal.
+
+        Args:
+            value: e.g. 'University of Chicago Library' or 0.
+            datatype (URIRef): optional.
+            lang (str): optional.
+
+        Returns:
+            Literal
+        """
+        return self._get(
+            (Literal, type(value), value, datatype, lang),
+            lambda: Literal(value, datatype=datatype, lang=lang)
+        )
+
+    def stats(self):
+        """Get the cache's counters.
+
+        Returns:
+            dict: terms, hits, misses, evictions and bytes.
+        """
+        return {
+            'terms': len(self.terms),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'bytes': self.bytes
+        }
+
+
+# terms shared by every item in a process.
+terms = TermCache()
+
+
+def edm_graph(graph=None):
+    """Bind the EDM namespace prefixes to a graph.
+
+    Args:
+        graph (Graph or NTriplesSink): optional. By default a new Graph.
+
+    Returns:
+        Graph or NTriplesSink
+    """
+    if graph is None:
+        graph = Graph()
+    for prefix, ns in EDM_PREFIXES:
+        graph.bind(prefix, ns)
+    return graph
+
+
 class DigitalCollectionToEDM:
     MAPS = Namespace('https://repository.lib.uchicago.edu/digital_collections/maps')
     MAPS_AGG = MAPS['/aggregation']
@@ -176,59 +567,1114 @@ class DigitalCollectionToEDM:
     CHISOC_CHO = CHISOC['']
     CHISOC_REM = CHISOC['/rem']
 
-    graph = Graph()
-    for prefix, ns in (('bf', BF), ('dc', DC), ('dcterms', DCTERMS),
-                       ('edm', EDM), ('erc', ERC), ('madsrdf', MADSRDF),
-                       ('mix', MIX), ('ore', ORE), ('premis', PREMIS),
-                       ('premis2', PREMIS2), ('premis3', PREMIS3)):
-        graph.bind(prefix, ns)
+    def __init__(self, graph=None):
+        """Initialize an instance of the class DigitalCollectionToEDM. Each
+        instance gets a graph of its own, so converting many items in one
+        process doesn't pile them all up in a single graph.
 
-    def __init__(self):
-        self.graph = Graph()
-        for prefix, ns in (('bf', BF), ('dc', DC), ('dcterms', DCTERMS),
-                           ('edm', EDM), ('erc', ERC), ('madsrdf', MADSRDF),
-                           ('mix', MIX), ('ore', ORE), ('premis', PREMIS),
-                           ('premis2', PREMIS2), ('premis3', PREMIS3)):
-            self.graph.bind(prefix, ns)
+        Args:
+            graph (Graph or NTriplesSink): optional, where to add triples. By
+                default a new Graph.
+        """
+        self.graph = edm_graph(graph)
 
         self.now = Literal(datetime.datetime.utcnow(), datatype=XSD.dateTime)
 
     def agg_graph(self, agg, cho, rem, wbr):
-        for p, o in ((RDF.type,          ORE.Aggregation),
-                     (EDM.aggregatedCHO, cho),
-                     (EDM.dataProvider,  Literal("University of Chicago Library")),
-                     (ORE.isDescribedBy, rem),
-                     (EDM.isShownAt,     wbr),
-                     (EDM.isShownBy,     wbr),
-                     (EDM.object,        URIRef('http://example.org/')),
-                     (EDM.provider,      Literal('University of Chicago Library')),
-                     (EDM.rights,        URIRef('http://creativecommons.org/licenses/by-nc/4.0/'))):
+        for p, o in ((RDF.type,                          terms.term(ORE, 'Aggregation')),
+                     (terms.term(EDM, 'aggregatedCHO'),  cho),
+                     (terms.term(EDM, 'dataProvider'),   terms.literal('University of Chicago Library')),
+                     (terms.term(ORE, 'isDescribedBy'),  rem),
+                     (terms.term(EDM, 'isShownAt'),      wbr),
+                     (terms.term(EDM, 'isShownBy'),      wbr),
+                     (terms.term(EDM, 'object'),         terms.uri('http://example.org/')),
+                     (terms.term(EDM, 'provider'),       terms.literal('University of Chicago Library')),
+                     (terms.term(EDM, 'rights'),         terms.uri('http://creativecommons.org/licenses/by-nc/4.0/'))):
             self.graph.add((agg, p, o))
    
     def rem_graph(self, agg, rem, now):
         # as per CB on 11/6/2020, DCTERMS:creator should be
         # https://repository.lib.uchicago.edu/ - note https and trailing
         # slash, while ProvidedCHOs should not include a trailing slash.
-        for p, o in ((RDF.type,         ORE.ResourceMap),
-                     (DCTERMS.modified, now),
-                     (DCTERMS.creator,  URIRef('https://repository.lib.uchicago.edu/')),
-                     (ORE.describes,    agg)):
+        for p, o in ((RDF.type,                         terms.term(ORE, 'ResourceMap')),
+                     (terms.term(DCTERMS, 'modified'),  now),
+                     (terms.term(DCTERMS, 'creator'),   terms.uri('https://repository.lib.uchicago.edu/')),
+                     (terms.term(ORE, 'describes'),     agg)):
             self.graph.add((rem, p, o))
 
-    @classmethod
     def triples(self):
         """Return EDM data as a string.
 
         Returns:
             str
         """
-        return self.graph.serialize(format='turtle', base='ark:/61001/').decode("utf-8")
+        return turtle(self.graph, 'ark:/61001/')
+
+
+class EDMCollectionWriter:
+    """Write the EDM for a collection one item at a time.
+
+    Each item is built in a graph of its own, which is written out and
+    released as soon as the item is added. Collection-level triples are
+    built afterwards from a summary of the items: the URI of each item's
+    cultural heritage object. A batch run's memory use therefore doesn't
+    grow with the triples of the items it has already written.
+    """
+
+    def __init__(self, out, format='turtle', base='ark:/61001/'):
+        """Initialize a writer.
+
+        Args:
+            out (file): a text file object.
+            format (str): 'turtle' or 'nt'. With 'nt', item triples are
+                streamed to out as they are built.
+            base (str): base URI for Turtle output.
+        """
+        self.out = out
+        self.format = format
+        self.base = base
+        self.items = []
+
+    def new_graph(self):
+        """Return somewhere to build the triples for one item or for the
+        collection.
+
+        Returns:
+            Graph or NTriplesSink
+        """
+        if self.format == 'nt':
+            return NTriplesSink(self.out)
+        return edm_graph()
+
+    def write(self, graph):
+        """Write a graph's triples. Each graph is written as a complete
+        Turtle document with its own prefixes; documents can be concatenated.
+
+        Args:
+            graph (Graph or NTriplesSink)
+
+        Side Effect:
+            Writes to self.out.
+        """
+        if isinstance(graph, Graph) and len(graph) > 0:
+            if self.format == 'turtle':
+                write_turtle(graph, self.out, self.base)
+            else:
+                self.out.write(graph.serialize(format=self.format, base=self.base).decode('utf-8'))
+
+    def add_item(self, edm):
+        """Write an item's triples, remember its CHO and release its graph.
+
+        Args:
+            edm (DigitalCollectionToEDM): an item with its triples built.
+
+        Side Effect:
+            Writes to self.out and sets edm.graph to None.
+        """
+        self.write(edm.graph)
+        self.items.append(edm.cho)
+        edm.graph = None
+
+
+@functools.lru_cache(maxsize=None)
+def code_version(*paths):
+    """Fingerprint the source of the code that builds a collection's EDM, so
+    that changing a crosswalk invalidates the output it built.
+
+    Args:
+        paths (str): source files, e.g. this module and a collection's
+            script.
+
+    Returns:
+        str: a hex digest.
+    """
+    m = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            m.update(f.read())
+    return m.hexdigest()
+
+
+def file_fingerprint(path):
+    """Describe a file by its size and modification time, without reading it.
+
+    Args:
+        path (str)
+
+    Returns:
+        list: [size, mtime in nanoseconds], or None if the file is missing.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def marc_fingerprint(record):
+    """Describe a MARC record by its 005, date and time of latest
+    transaction, field.
+
+    Args:
+        record (pymarc.Record)
+
+    Returns:
+        str, or None if the record has no 005.
+    """
+    fields = record.get_fields('005')
+    if fields:
+        return fields[0].data
+    return None
+
+
+def fingerprint(*inputs):
+    """Combine descriptions of an item's inputs into a single fingerprint.
+
+    Args:
+        inputs: JSON serializable values, e.g. from code_version(),
+            file_fingerprint() or marc_fingerprint().
+
+    Returns:
+        str: a hex digest.
+    """
+    return hashlib.sha256(
+        json.dumps(inputs, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+class FingerprintManifest:
+    """Remember a fingerprint of the inputs each ARK's EDM was last built
+    from, so that regeneration can skip the items that haven't changed.
+
+    The manifest is a SQLite database with one row per ARK.
+    """
+
+    def __init__(self, path):
+        """Open or create a manifest.
+
+        Args:
+            path (str): a SQLite database file.
+        """
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS fingerprints (ark TEXT PRIMARY KEY, fingerprint TEXT, updated TEXT)'
+        )
+        self.conn.commit()
+
+    def get(self, ark):
+        """Get the fingerprint an ARK was last built from.
+
+        Returns:
+            str, or None if the ARK hasn't been built.
+        """
+        row = self.conn.execute(
+            'SELECT fingerprint FROM fingerprints WHERE ark = ?',
+            (ark,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def changed(self, ark, fingerprint):
+        """Check whether an ARK needs to be rebuilt.
+
+        Returns:
+            bool
+        """
+        return self.get(ark) != fingerprint
+
+    def update(self, ark, fingerprint):
+        """Record the fingerprint an ARK was just built from. Call this after
+        the item's EDM has been written, so that a failed run rebuilds it.
+
+        Side Effect:
+            Updates the manifest.
+        """
+        self.conn.execute(
+            'INSERT OR REPLACE INTO fingerprints (ark, fingerprint, updated) VALUES (?, ?, ?)',
+            (ark, fingerprint, datetime.datetime.utcnow().isoformat())
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class CollectionCache:
+    """Keep N-Triples dumps of MarkLogic collections on disk, so that
+    query_marklogic only downloads a collection again when it has changed,
+    and so that report_graph and visualize_graph can read a collection
+    without going to the server.
+
+    Each collection is stored as <sha256 of its URI>.nt, next to a .json file
+    recording the collection URI, its triple count and when it was
+    downloaded.
+    """
+
+    def __init__(self, directory=None):
+        """Args:
+            directory (str): cache directory. Defaults to $MARKLOGIC_CACHE,
+                or ~/.cache/marklogic.
+        """
+        self.directory = directory or os.environ.get('MARKLOGIC_CACHE') or \
+            os.path.join(os.path.expanduser('~'), '.cache', 'marklogic')
+
+    def _path(self, collection, extension):
+        return os.path.join(
+            self.directory,
+            hashlib.sha256(collection.encode('utf-8')).hexdigest() + extension
+        )
+
+    def info(self, collection):
+        """Get what is known about a cached collection.
+
+        Returns:
+            dict: collection, count and updated, or None if the collection
+                isn't cached.
+        """
+        try:
+            with open(self._path(collection, '.json'), encoding='utf-8') as f:
+                info = json.load(f)
+        except FileNotFoundError:
+            return None
+        if not os.path.exists(self._path(collection, '.nt')):
+            return None
+        return info
+
+    def path(self, collection):
+        """Get the path to a collection's N-Triples dump.
+
+        Returns:
+            str, or None if the collection isn't cached.
+        """
+        if self.info(collection) is None:
+            return None
+        return self._path(collection, '.nt')
+
+    @contextlib.contextmanager
+    def writer(self, collection):
+        """Replace a collection's dump. The dump is written to a temporary
+        file that only replaces the cached one if the block finishes, so an
+        interrupted download never leaves a partial dump in the cache.
+
+        Usage:
+            with cache.writer(collection) as (f, info):
+                info['count'] = write_triples(f)
+
+        Yields:
+            a text file object to write N-Triples to, and a dict to record
+            the triple count in.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        info = {'collection': collection, 'count': None}
+        try:
+            with open(fd, 'w', encoding='utf-8') as f:
+                yield f, info
+            # drop the old record first, so that a crash before the new
+            # one is written leaves the collection uncached.
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self._path(collection, '.json'))
+            os.replace(tmp, self._path(collection, '.nt'))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        info['updated'] = datetime.datetime.utcnow().isoformat()
+        with open(self._path(collection, '.json'), 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+
+
+FIXITY_ALGORITHMS = ('md5', 'sha1', 'sha256', 'sha512')
+
+
+class Fixity:
+    """Compute several message digests of the same data in one pass.
+
+    Data is fed to the digests a block at a time, so that each block is
+    still in the CPU cache when the next digest reads it. hashlib releases
+    the GIL while it hashes a block, so several files can be hashed at once
+    in threads.
+    """
+
+    block_size = 1024 * 1024
+
+    def __init__(self, algorithms=('md5', 'sha512')):
+        """Args:
+            algorithms (tuple): hashlib algorithm names, e.g. 'md5', 'sha1',
+                'sha256' or 'sha512'.
+        """
+        self.digests = collections.OrderedDict(
+            (a, hashlib.new(a)) for a in algorithms
+        )
+        self.size = 0
+
+    def update(self, data):
+        view = memoryview(data)
+        for i in range(0, len(view), self.block_size):
+            block = view[i:i + self.block_size]
+            for digest in self.digests.values():
+                digest.update(block)
+        self.size += len(view)
+
+    def hexdigests(self):
+        """Returns:
+            dict: the size in bytes, and a hex digest for each algorithm,
+                e.g. {'size': 3, 'md5': '...', 'sha512': '...'}
+        """
+        result = {'size': self.size}
+        for algorithm, digest in self.digests.items():
+            result[algorithm] = digest.hexdigest()
+        return result
+
+
+def file_fixity(path, algorithms=('md5', 'sha512'), chunk_size=8 * 1024 * 1024):
+    """Compute a file's size and message digests, reading it once.
+
+    The file is read in large chunks into a buffer that is reused, so memory
+    use doesn't depend on the size of the file.
+
+    Args:
+        path (str)
+        algorithms (tuple): hashlib algorithm names.
+        chunk_size (int): bytes to read at a time.
+
+    Returns:
+        dict, as from Fixity.hexdigests()
+    """
+    fixity = Fixity(algorithms)
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            fixity.update(view[:n])
+    return fixity.hexdigests()
+
+
+def files_fixity(paths, algorithms=('md5', 'sha512'), workers=4):
+    """Compute the size and message digests of several files at once, in
+    threads.
+
+    Args:
+        paths (list): of str.
+        algorithms (tuple): hashlib algorithm names.
+        workers (int): number of files to hash at once.
+
+    Returns:
+        list: of dicts as from file_fixity(), in the same order as paths.
+    """
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(lambda path: file_fixity(path, algorithms), paths))
+
+
+# TIFF tags for the technical metadata we record, by tag number.
+TIFF_TAGS = {
+    256: 'width',
+    257: 'height',
+    258: 'bits_per_sample',
+    259: 'compression',
+    262: 'photometric_interpretation',
+    277: 'samples_per_pixel',
+    282: 'x_resolution',
+    283: 'y_resolution',
+    296: 'resolution_unit'
+}
+
+# struct formats for TIFF field types. Rationals are pairs.
+TIFF_FIELD_TYPES = {
+    1: 'B', 3: 'H', 4: 'I', 5: 'II', 6: 'b', 7: 'B', 8: 'h', 9: 'i',
+    10: 'ii', 11: 'f', 12: 'd', 16: 'Q', 17: 'q', 18: 'Q'
+}
+
+
+def read_tiff_metadata(f):
+    """Read technical metadata from the first image file directory (IFD) of
+    a TIFF or BigTIFF, without decoding any pixels. Only the header, the IFD
+    and the values it points to are read, usually a few kilobytes however
+    large the image is.
+
+    Args:
+        f: a seekable binary file object.
+
+    Returns:
+        dict: width, height, bits_per_sample (a list, one per sample),
+            compression, photometric_interpretation, samples_per_pixel,
+            x_resolution, y_resolution and resolution_unit. Tags that are
+            missing get their TIFF defaults, or None if they have none.
+            Tags that are present but whose values can't be read are None.
+
+    Raises:
+        ValueError, if the file isn't a TIFF, its IFD is truncated, or it
+        has no dimensions.
+    """
+    f.seek(0)
+    header = f.read(16)
+    if header[:2] == b'II':
+        order = '<'
+    elif header[:2] == b'MM':
+        order = '>'
+    else:
+        raise ValueError('not a TIFF')
+
+    version = struct.unpack(order + 'H', header[2:4])[0]
+    if version == 42:
+        count_format, offset_format = 'H', 'I'
+        ifd_offset = struct.unpack(order + 'I', header[4:8])[0]
+    elif version == 43:
+        count_format, offset_format = 'Q', 'Q'
+        ifd_offset = struct.unpack(order + 'Q', header[8:16])[0]
+    else:
+        raise ValueError('not a TIFF')
+    # an entry is a tag, a field type, a count and a value or offset.
+    offset_size = struct.calcsize(offset_format)
+    entry_size = 4 + 2 * offset_size
+    count_size = struct.calcsize(count_format)
+
+    f.seek(ifd_offset)
+    data = f.read(count_size)
+    if len(data) < count_size:
+        raise ValueError('truncated TIFF')
+    entries = struct.unpack(order + count_format, data)[0]
+    data = f.read(entries * entry_size)
+    if len(data) < entries * entry_size:
+        raise ValueError('truncated TIFF')
+
+    fields = {}
+    for i in range(0, len(data) - entry_size + 1, entry_size):
+        tag, field_type = struct.unpack(order + 'HH', data[i:i + 4])
+        if tag not in TIFF_TAGS or field_type not in TIFF_FIELD_TYPES:
+            continue
+        count = struct.unpack(order + offset_format, data[i + 4:i + 4 + offset_size])[0]
+        value_format = order + TIFF_FIELD_TYPES[field_type] * count
+        size = struct.calcsize(value_format)
+        if size <= offset_size:
+            raw = data[i + 4 + offset_size:i + 4 + offset_size + size]
+        else:
+            raw = b''
+            if count <= 1024:
+                f.seek(struct.unpack(order + offset_format, data[i + 4 + offset_size:i + entry_size])[0])
+                raw = f.read(size)
+            if len(raw) < size:
+                # present, but unreadable: don't fall back to the default.
+                fields[TIFF_TAGS[tag]] = None
+                continue
+        values = struct.unpack(value_format, raw)
+        if field_type in (5, 10):
+            values = tuple(n / d if d else 0.0 for n, d in zip(values[::2], values[1::2]))
+        fields[TIFF_TAGS[tag]] = values
+
+    def field(name, default):
+        if name not in fields:
+            return default
+        return None if fields[name] is None else fields[name][0]
+
+    if field('width', None) is None or field('height', None) is None:
+        raise ValueError('TIFF has no dimensions')
+
+    samples_per_pixel = field('samples_per_pixel', 1)
+    if 'bits_per_sample' not in fields:
+        bits_per_sample = [1]
+    elif fields['bits_per_sample'] is None:
+        bits_per_sample = None
+    else:
+        bits_per_sample = list(fields['bits_per_sample'])
+    if bits_per_sample and len(bits_per_sample) == 1 and samples_per_pixel:
+        bits_per_sample = bits_per_sample * samples_per_pixel
+    return {
+        'width': field('width', None),
+        'height': field('height', None),
+        'bits_per_sample': bits_per_sample,
+        'compression': field('compression', 1),
+        'photometric_interpretation': field('photometric_interpretation', None),
+        'samples_per_pixel': samples_per_pixel,
+        'x_resolution': field('x_resolution', None),
+        'y_resolution': field('y_resolution', None),
+        'resolution_unit': field('resolution_unit', 2)
+    }
+
+
+def tiff_metadata(path):
+    """Read technical metadata from a TIFF file's header.
+
+    Returns:
+        dict, as from read_tiff_metadata()
+    """
+    with open(path, 'rb') as f:
+        return read_tiff_metadata(f)
+
+
+class TiffHeaderCapture:
+    """Keep the parts of a TIFF that its technical metadata is read from
+    while the file streams past, so that a master file can be hashed and
+    described in one pass without holding it in memory.
+
+    The capture works out what to keep by running read_tiff_metadata()
+    against what it has so far. Each read it can't answer yet is a range of
+    bytes to keep when it arrives: first the header, then the IFD it points
+    to, then the values the IFD points to, wherever they are after it. That
+    covers files that put their IFD and its values after the image data.
+    Ranges that had already gone past by the time they were asked for are
+    listed in missing.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.segments = {}
+        self.pending = [(0, 16)]
+        self.missing = []
+        self._chunk = (0, b'')
+        self._pos = 0
+        self._final = False
+
+    def update(self, data):
+        start = self.offset
+        self.offset += len(data)
+        self._chunk = (start, data)
+        arrived = False
+        pending = []
+        for begin, end in self.pending:
+            overlap = data[max(begin - start, 0):max(min(end, self.offset) - start, 0)]
+            if overlap:
+                self.segments.setdefault(begin, bytearray()).extend(overlap)
+            if end <= self.offset:
+                arrived = True
+            else:
+                pending.append((begin, end))
+        self.pending = pending
+        if arrived:
+            # find out what the new bytes point to.
+            try:
+                read_tiff_metadata(self)
+            except ValueError:
+                pass
+
+    def add(self, offset, data):
+        """Keep a range of bytes fetched some other way, e.g. with an HTTP
+        range request for one of the missing ranges."""
+        self.segments[offset] = bytearray(data)
+
+    def seek(self, offset):
+        self._pos = offset
+
+    def read(self, size):
+        """Read bytes that have been kept, or that are in the current chunk,
+        as read_tiff_metadata() expects of a file. Ranges that aren't
+        available are remembered as pending or missing, and read short."""
+        begin, end = self._pos, self._pos + size
+        for start, segment in self.segments.items():
+            if start <= begin and end <= start + len(segment):
+                self._pos = end
+                return bytes(segment[begin - start:end - start])
+
+        chunk_start, chunk = self._chunk
+        if chunk_start <= begin and end <= chunk_start + len(chunk):
+            self.segments[begin] = bytearray(chunk[begin - chunk_start:end - chunk_start])
+            self._pos = end
+            return bytes(self.segments[begin])
+
+        if not self._final and begin >= chunk_start:
+            if (begin, end) not in self.pending:
+                self.segments[begin] = bytearray(chunk[begin - chunk_start:])
+                self.pending.append((begin, end))
+        elif (begin, end) not in self.missing:
+            self.missing.append((begin, end))
+        return b''
+
+    def metadata(self, read_range=None):
+        """Read the technical metadata once the whole file has gone past.
+
+        Args:
+            read_range: optional, a function that takes an offset and a size
+                and returns those bytes of the file, or b'' if it can't. It
+                is called for each missing range.
+
+        Returns:
+            dict, as from read_tiff_metadata(). Values in ranges that are
+            still missing are None.
+
+        Raises:
+            ValueError, if the file isn't a TIFF, or its IFD is missing.
+        """
+        self._final = True
+        self._chunk = (self.offset, b'')
+        self.missing = []
+        result = read_tiff_metadata(self)
+        if self.missing and read_range:
+            for begin, end in self.missing:
+                data = read_range(begin, end - begin)
+                if len(data) == end - begin:
+                    self.add(begin, data)
+            self.missing = []
+            result = read_tiff_metadata(self)
+        return result
+
+
+def stream_tiff_fixity(chunks, algorithms=('md5', 'sha512'), read_range=None):
+    """Compute a TIFF's size and message digests and read its technical
+    metadata as it arrives, e.g. from Response.iter_content(). Only the
+    current chunk and the parts of the TIFF that TiffHeaderCapture keeps are
+    held in memory.
+
+    Args:
+        chunks: an iterable of bytes.
+        algorithms (tuple): hashlib algorithm names.
+        read_range: optional, see TiffHeaderCapture.metadata().
+
+    Returns:
+        dict, as from read_tiff_metadata(), with the size and digests as
+        from Fixity.hexdigests().
+
+    Raises:
+        ValueError, if the data isn't a TIFF.
+    """
+    fixity = Fixity(algorithms)
+    capture = TiffHeaderCapture()
+    for chunk in chunks:
+        fixity.update(chunk)
+        capture.update(chunk)
+    result = capture.metadata(read_range)
+    result.update(fixity.hexdigests())
+    return result
+
+
+# MIX names for TIFF compression, photometric interpretation and resolution
+# unit values.
+TIFF_COMPRESSION = {
+    1: 'Uncompressed',
+    2: 'CCITT 1D',
+    3: 'CCITT Group 3',
+    4: 'CCITT Group 4',
+    5: 'LZW',
+    6: 'JPEG',
+    7: 'JPEG',
+    8: 'Deflate',
+    32773: 'PackBits',
+    32946: 'Deflate',
+    34712: 'JPEG 2000'
+}
+
+TIFF_PHOTOMETRIC = {
+    0: 'WhiteIsZero',
+    1: 'BlackIsZero',
+    2: 'RGB',
+    3: 'PaletteColor',
+    4: 'TransparencyMask',
+    5: 'CMYK',
+    6: 'YCbCr',
+    8: 'CIELab',
+    9: 'ICCLab',
+    10: 'ITULab'
+}
+
+TIFF_RESOLUTION_UNIT = {
+    1: 'no absolute unit of measurement',
+    2: 'in.',
+    3: 'cm'
+}
+
+
+def tiff_resolution(value):
+    """Write a TIFF resolution as an integer when it is one."""
+    return int(value) if value == int(value) else value
+
+
+def mix_graph(graph, wbr, metadata):
+    """Add MIX technical metadata for an image to its web resource.
+
+    Args:
+        graph (Graph or NTriplesSink): where to add triples.
+        wbr (URIRef): the web resource.
+        metadata (dict): as from read_tiff_metadata(). Only the keys that
+            are present are added.
+    """
+    for key, p, value in (
+        ('width',                      'imageWidth',            lambda v: v),
+        ('height',                     'imageHeight',           lambda v: v),
+        ('bits_per_sample',            'bitsPerSampleValue',    lambda v: ','.join(str(b) for b in v)),
+        ('samples_per_pixel',          'samplesPerPixel',       lambda v: v),
+        ('compression',                'compressionScheme',     lambda v: TIFF_COMPRESSION.get(v, str(v))),
+        ('photometric_interpretation', 'colorSpace',            lambda v: TIFF_PHOTOMETRIC.get(v, str(v))),
+        ('x_resolution',               'xSamplingFrequency',    tiff_resolution),
+        ('y_resolution',               'ySamplingFrequency',    tiff_resolution),
+        ('resolution_unit',            'samplingFrequencyUnit', lambda v: TIFF_RESOLUTION_UNIT.get(v, str(v)))):
+        if metadata.get(key) is not None:
+            # the values differ from image to image, so they aren't cached.
+            graph.add((wbr, terms.term(MIX, p), Literal(value(metadata[key]))))
+
+
+class FixityCache:
+    """Remember the message digests of files, so that master files that
+    haven't changed aren't read again each time their EDM is built.
+
+    A digest is reused only while the file's path, size, modification time
+    and inode all match what they were when it was computed, so checking the
+    cache costs one stat per file. The cache is a SQLite database with one
+    row per file and algorithm. It can be shared by threads and by worker
+    processes.
+
+    Master files that are downloaded are remembered by URL, along with the
+    ETag and Last-Modified headers they were served with, and are only
+    downloaded again if the server says they have changed.
+    """
+
+    def __init__(self, path=None, verify=False):
+        """Args:
+            path (str): a SQLite database file. Defaults to $FIXITY_DB, or
+                ~/.cache/fixity.db.
+            verify (bool): hash every file again, even if it looks
+                unchanged, and report digests that differ from the cached
+                ones.
+        """
+        self.path = path or os.getenv('FIXITY_DB') or \
+            os.path.join(os.path.expanduser('~'), '.cache', 'fixity.db')
+        self.verify = verify
+        self.mismatches = []
+        self.lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self):
+        """Connect the first time the cache is used in each process, so that
+        worker processes don't share a connection made before they forked."""
+        if self._conn is None or self._pid != os.getpid():
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS fixity (path TEXT, algorithm TEXT, size INTEGER, mtime_ns INTEGER, inode INTEGER, digest TEXT, updated TEXT, PRIMARY KEY (path, algorithm))'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS remote_fixity (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, metadata TEXT, updated TEXT)'
+            )
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def file_fixity(self, path, algorithms=('md5', 'sha512')):
+        """Get a file's size and message digests, from the cache if the file
+        hasn't changed, or by hashing it.
+
+        Args:
+            path (str)
+            algorithms (tuple): hashlib algorithm names.
+
+        Returns:
+            dict, as from file_fixity()
+
+        Side Effect:
+            Records new digests in the cache. With verify, digests that
+            differ from the cached ones for an unchanged file are added to
+            mismatches and reported on stderr.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        with self.lock:
+            cached = dict(self.conn.execute(
+                'SELECT algorithm, digest FROM fixity WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?',
+                key
+            ).fetchall())
+
+        if not self.verify and all(a in cached for a in algorithms):
+            result = {'size': stat.st_size}
+            for algorithm in algorithms:
+                result[algorithm] = cached[algorithm]
+            return result
+
+        result = file_fixity(path, algorithms)
+        for algorithm in algorithms:
+            if algorithm in cached and cached[algorithm] != result[algorithm]:
+                self.mismatches.append((path, algorithm))
+                sys.stderr.write('{} digest changed for {}\n'.format(algorithm, path))
+
+        updated = datetime.datetime.utcnow().isoformat()
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO fixity (path, algorithm, size, mtime_ns, inode, digest, updated) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [key[:1] + (a,) + key[1:] + (result[a], updated) for a in algorithms]
+            )
+            self.conn.commit()
+        return result
+
+    def tiff_url_fixity(self, session, url, algorithms=('md5', 'sha512'), chunk_size=1024 * 1024):
+        """Get a remote TIFF's size, message digests and technical metadata,
+        from the cache if the server says it hasn't changed, or by streaming
+        it.
+
+        The request is made conditional on the ETag and Last-Modified headers
+        the TIFF was last served with. If it has changed, or the server
+        ignores the conditions, it is hashed as it is downloaded, a chunk at a
+        time. Metadata values that had already gone past by the time the IFD
+        pointed to them are fetched with range requests. If they still can't
+        be read, they are None, and the result isn't cached.
+
+        Args:
+            session: a requests.Session, or the requests module.
+            url (str)
+            algorithms (tuple): hashlib algorithm names.
+            chunk_size (int): bytes to read at a time.
+
+        Returns:
+            dict, as from stream_tiff_fixity()
+
+        Raises:
+            ValueError, if the file isn't a TIFF.
+            requests.HTTPError, for an error response.
+
+        Side Effect:
+            Records the new metadata and headers in the cache. With verify,
+            the TIFF is always downloaded, and digests that differ from the
+            cached ones while the headers are the same are added to
+            mismatches and reported on stderr.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT etag, last_modified, metadata FROM remote_fixity WHERE url = ?',
+                (url,)
+            ).fetchone()
+        etag, last_modified, cached = (None, None, None)
+        if row:
+            etag, last_modified, cached = row[0], row[1], json.loads(row[2])
+
+        headers = {}
+        if cached and not self.verify and all(a in cached for a in algorithms):
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        response = session.get(url, headers=headers, stream=True)
+        try:
+            if response.status_code == 304 and headers:
+                return cached
+            response.raise_for_status()
+            fixity = Fixity(algorithms)
+            capture = TiffHeaderCapture()
+            for chunk in response.iter_content(chunk_size):
+                fixity.update(chunk)
+                capture.update(chunk)
+        finally:
+            response.close()
+
+        def read_range(offset, size):
+            r = session.get(url, headers={'Range': 'bytes={}-{}'.format(offset, offset + size - 1)}, stream=True)
+            try:
+                # a server that ignores the range would send the whole file.
+                return r.raw.read(size, decode_content=True) if r.status_code == 206 else b''
+            finally:
+                r.close()
+
+        result = capture.metadata(read_range)
+        result.update(fixity.hexdigests())
+
+        new_etag = response.headers.get('ETag')
+        new_last_modified = response.headers.get('Last-Modified')
+        if cached and (new_etag, new_last_modified) == (etag, last_modified):
+            for algorithm in algorithms:
+                if algorithm in cached and cached[algorithm] != result[algorithm]:
+                    self.mismatches.append((url, algorithm))
+                    sys.stderr.write('{} digest changed for {}\n'.format(algorithm, url))
+
+        if capture.missing:
+            # don't serve incomplete metadata on every 304 from now on.
+            sys.stderr.write('incomplete TIFF metadata for {}\n'.format(url))
+            return result
+
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO remote_fixity (url, etag, last_modified, metadata, updated) VALUES (?, ?, ?, ?, ?)',
+                (url, new_etag, new_last_modified, json.dumps(result),
+                 datetime.datetime.utcnow().isoformat())
+            )
+            self.conn.commit()
+        return result
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class ElementTreeXmlBackend:
+    """Parse XML with the standard library's xml.etree.ElementTree."""
+
+    name = 'etree'
+
+    def element(self, tag):
+        return ElementTree.Element(tag)
+
+    def fromstring(self, text):
+        return ElementTree.fromstring(text)
+
+    def parse(self, source):
+        return ElementTree.parse(source)
+
+    def iterparse(self, source, events):
+        return ElementTree.iterparse(source, events=events)
+
+    def iter_elements(self, source, tag):
+        """Yield each completed element with the given tag, detaching it from
+        the document once the caller moves on to the next one."""
+        root = None
+        for event, element in ElementTree.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+            elif element.tag == tag:
+                yield element
+                if element is not root:
+                    root.clear()
+
+    def xpath(self, element, path, namespaces=None):
+        """Find elements in an element or a parsed document with the limited
+        XPath subset that ElementTree supports."""
+        return element.findall(path, namespaces)
+
+
+class LxmlXmlBackend(ElementTreeXmlBackend):
+    """Parse XML with lxml's C parser, and evaluate full XPath expressions.
+    Elements support the same API as ElementTree elements."""
+
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree
+        self.etree = etree
+        self.parser = etree.XMLParser(encoding='utf-8')
+
+    def element(self, tag):
+        return self.etree.Element(tag)
+
+    def fromstring(self, text):
+        # lxml refuses str input with an encoding declaration.
+        if isinstance(text, str):
+            return self.etree.fromstring(text.encode('utf-8'), self.parser)
+        return self.etree.fromstring(text)
+
+    def parse(self, source):
+        return self.etree.parse(source)
+
+    def iterparse(self, source, events):
+        return self.etree.iterparse(source, events=events)
+
+    def iter_elements(self, source, tag):
+        for _, element in self.etree.iterparse(source, events=('end',), tag=tag):
+            yield element
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+                parent.remove(element)
+
+    def xpath(self, element, path, namespaces=None):
+        return element.xpath(path, namespaces=namespaces)
+
+
+def get_xml_backend(name=None):
+    """Get an XML parsing backend.
+
+    Args:
+        name (str): 'lxml' or 'etree'. By default, use lxml if it is
+            installed and ElementTree otherwise.
+
+    Returns:
+        an XML backend.
+    """
+    if name == 'etree':
+        return ElementTreeXmlBackend()
+    try:
+        return LxmlXmlBackend()
+    except ImportError:
+        if name == 'lxml':
+            raise
+        return ElementTreeXmlBackend()
+
+xml_backend = get_xml_backend()
+
+def set_xml_backend(name=None):
+    """Switch the XML parsing backend used by the converters.
+
+    Args:
+        name (str): 'lxml', 'etree', or None for the default.
+    """
+    global xml_backend
+    xml_backend = get_xml_backend(name)
+
+def iter_marcxml_records(source):
+    """Stream the records in a MARCXML collection without loading the whole
+    file. Finished records are detached from the document as soon as the
+    caller moves on to the next one, so memory use doesn't grow with the size
+    of the collection.
+
+    Args:
+        source (str or file): a filename or file object containing a
+            marcxml collection.
+
+    Returns:
+        generator: of elements, one per record.
+    """
+    return xml_backend.iter_elements(source, MARCXML_RECORD)
+
+
+def marcxml_fields(record):
+    """Read the fields of a MARCXML record element.
+
+    Args:
+        record (Element): a MARCXML record, from either XML backend.
+
+    Returns:
+        generator: of (tag, ind1, ind2, value) tuples. Control fields have
+            None for both indicators and their text as the value. Data fields
+            have a tuple of (code, text) pairs as the value.
+    """
+    for element in record:
+        if element.tag == MARCXML_CONTROLFIELD:
+            yield element.attrib['tag'], None, None, element.text
+        elif element.tag == MARCXML_DATAFIELD:
+            yield (
+                element.attrib['tag'],
+                element.attrib['ind1'],
+                element.attrib['ind2'],
+                tuple(
+                    (subfield.attrib['code'], subfield.text)
+                    for subfield in element
+                )
+            )
+
+def pymarc_fields(record):
+    """Read the fields of a pymarc record, in the same form as
+    marcxml_fields().
+
+    Args:
+        record (pymarc.Record)
+
+    Returns:
+        generator: of (tag, ind1, ind2, value) tuples.
+    """
+    for field in record.fields:
+        if field.is_control_field():
+            yield field.tag, None, None, field.data
+        else:
+            subfields = field.subfields
+            # older versions of pymarc keep subfields as a flat list of
+            # codes and values.
+            if subfields and not isinstance(subfields[0], tuple):
+                subfields = pairwise(subfields)
+            yield (
+                field.tag,
+                field.indicator1,
+                field.indicator2,
+                tuple((code, text) for code, text in subfields)
+            )
 
 
 class MarcXmlConverter:
     """
     A class to convert MARCXML to other formats. Extend this class to make
-    converters for outputting specific formats. 
+    converters for outputting specific formats. pymarc records and binary
+    MARC are read through the same field index, without a round trip
+    through MARCXML.
 
     Returns:
         a MarcXmlConverter
@@ -238,22 +1684,68 @@ class MarcXmlConverter:
         """Initialize an instance of the class MarcXmlConverter.
 
         Args:
-            marcxml (str): a marcxml collection with a single record.
-        """
-        self.record = ElementTree.fromstring(marcxml).find(
-            '{http://www.loc.gov/MARC21/slim}record')
-
-        # Only bring in 655's where the $2 subfield is set to 'lcgft'.
-        remove = []
-        for element in self.record:
-            if element.tag == '{http://www.loc.gov/MARC21/slim}datafield':
-                if element.attrib['tag'] == '655':
-                    for subfield in element:
-                        if subfield.attrib['code'] == '2' and not subfield.text == 'lcgft':
-                            remove.append(element)
-                            break
-        for element in remove:
-            self.record.remove(element)
+            marcxml (str): a marcxml collection with a single record, or an
+                already parsed MARCXML record element, e.g. one yielded by
+                iter_marcxml_records(). A pymarc.Record or a binary MARC
+                (ISO 2709) record as bytes can be used directly as well.
+        """
+        if isinstance(marcxml, pymarc.Record):
+            self.record = marcxml
+            fields = pymarc_fields(self.record)
+        elif isinstance(marcxml, bytes) and not marcxml.lstrip().startswith(b'<'):
+            self.record = pymarc.Record(
+                data=marcxml,
+                to_unicode=True,
+                force_utf8=True
+            )
+            fields = pymarc_fields(self.record)
+        else:
+            if ElementTree.iselement(marcxml):
+                self.record = marcxml
+            else:
+                self.record = xml_backend.fromstring(marcxml).find(MARCXML_RECORD)
+            fields = marcxml_fields(self.record)
+
+        self._index_fields(fields)
+
+    @classmethod
+    def iterparse(cls, source):
+        """Convert every record in a MARCXML collection, one at a time.
+
+        Args:
+            source (str or file): a filename or file object containing a
+                marcxml collection.
+
+        Returns:
+            generator: of instances of this class, one per record.
+        """
+        for record in iter_marcxml_records(source):
+            yield cls(record)
+
+    def _index_fields(self, fields):
+        """Index the record's fields by tag, so that get_marc_field() doesn't
+        have to scan the whole record on every call.
+
+        Args:
+            fields (iterable): of (tag, ind1, ind2, value) tuples, see
+                marcxml_fields() and pymarc_fields().
+
+        Side Effect:
+            Sets self.control_fields, a dict of tags to lists of values, and
+            self.data_fields, a dict of tags to lists of
+            (ind1, ind2, ((code, text), ...)) tuples, both in record order.
+        """
+        self.control_fields = {}
+        self.data_fields = {}
+        for tag, ind1, ind2, value in fields:
+            if ind1 is None:
+                self.control_fields.setdefault(tag, []).append(value)
+                continue
+            # Only bring in 655's where the $2 subfield is set to 'lcgft'.
+            if tag == '655':
+                if any(code == '2' and not text == 'lcgft' for code, text in value):
+                    continue
+            self.data_fields.setdefault(tag, []).append((ind1, ind2, value))
 
     def get_marc_field(self, field_tag, subfield_code, ind1, ind2):
         """Get a specific MARC field. 
@@ -267,27 +1759,253 @@ class MarcXmlConverter:
         Returns:
             list: of strings, all matching MARC tags and subfields.
         """
+        if field_tag in self.control_fields:
+            return list(self.control_fields[field_tag])
+
         results = []
-        for element in self.record:
-            try:
-                if not element.attrib['tag'] == field_tag:
-                    continue
-            except KeyError:
+        ind1_match = compile_pattern(ind1).match
+        ind2_match = compile_pattern(ind2).match
+        subfield_match = compile_pattern(subfield_code).match
+        for field_ind1, field_ind2, subfields in self.data_fields.get(field_tag, ()):
+            if not ind1_match(field_ind1):
                 continue
-            if element.tag == '{http://www.loc.gov/MARC21/slim}controlfield':
-                results.append(element.text)
-            elif element.tag == '{http://www.loc.gov/MARC21/slim}datafield':
-                if not re.match(ind1, element.attrib['ind1']):
-                    continue
-                if not re.match(ind2, element.attrib['ind2']):
-                    continue
-                for subfield in element:
-                    if re.match(subfield_code, subfield.attrib['code']):
-                        results.append(subfield.text)
+            if not ind2_match(field_ind2):
+                continue
+            for code, text in subfields:
+                if subfield_match(code):
+                    results.append(text)
         return results
 
+    def _get_description(self):
+        """Get a description from the first 500 or 538 field, following the
+        dc:description crosswalk.
+
+        Returns:
+            str
+        """
+        for n in ('500', '538'):
+            description = ' '.join(self.get_marc_field(n, '[a-z]', '.', '.'))
+            if description:
+                return description
+        return ''
+
+    def _get_title(self):
+        """Get a title from the 245 $a and $b, following the dc:title
+        crosswalk.
+
+        Returns:
+            str
+        """
+        return ' '.join(self.get_marc_field('245', '[ab]', '.', '.'))
+
+
+# get language from specific character positions in the 008.
+# see https://www.loc.gov/marc/languages/ for a lookup table.
+MARC_CODE_LIST_FOR_LANGUAGES = {
+    'eng': 'en'
+}
+
+MARC_LOWERCASE_SUBFIELDS = string.ascii_lowercase
+
+def sorted_set(values):
+    return sorted(set(values))
+
+def is_fast_geographic_heading(field):
+    return field.indicator2 == '7' and field['2'] == 'fast'
+
+def compile_dc_mappings(mappings):
+    """Turn a table of Dublin Core mappings into a plan that can be filled in
+    with a single pass over each record's fields.
+
+    Args:
+        mappings (list): of (element, sources, combine) rows, see
+            MarcXmlToDc.mappings.
+
+    Returns:
+        tuple: a dict of (record, tag) pairs to lists of (slot, subfields,
+            condition, group, clean) tuples, a list of (element, sources,
+            combine) rows where each MARC source has been replaced by its
+            slots, and the number of slots.
+    """
+    fields_by_tag = {}
+    rows = []
+    slot = 0
+    for element, sources, combine in mappings:
+        row_sources = []
+        for source in sources:
+            if callable(source):
+                row_sources.append(source)
+                continue
+            record, field_tags, subfields, condition, group, clean = source
+            for field_tag in field_tags:
+                fields_by_tag.setdefault((record, field_tag), []).append(
+                    (slot, subfields, condition, group, clean)
+                )
+                row_sources.append(slot)
+                slot += 1
+        rows.append((element, row_sources, combine))
+    return fields_by_tag, rows, slot
+
+def override_mappings(mappings, overrides):
+    """Make a copy of a table of Dublin Core mappings with some rows replaced
+    or removed, for collections that crosswalk some elements differently.
+
+    Args:
+        mappings (list): of (element, sources, combine) rows.
+        overrides (dict): of element tags to (sources, combine) tuples, or to
+            None to leave the element out.
+
+    Returns:
+        list
+    """
+    rows = []
+    for element, sources, combine in mappings:
+        if element in overrides:
+            if overrides[element] is None:
+                continue
+            sources, combine = overrides[element]
+        rows.append((element, sources, combine))
+    return rows
+
 
 class MarcXmlToDc:
+    """A class to convert a digital MARC record and its linked print record
+    to Dublin Core.
+
+    Each row of mappings is an (element, sources, combine) tuple. Sources are
+    either functions that take the converter and return a list of strings,
+    or (record, tags, subfields, condition, group, clean) tuples, where:
+
+        record is 'digital' or 'print'.
+        tags is a tuple of MARC tags. Values come out in tag order.
+        subfields is a string of subfield codes, or None for the value of a
+            control field.
+        condition is a function that takes a pymarc field and returns False
+            to skip it, or None.
+        group is a function that combines the subfields of a single field
+            into one value, or None to keep each subfield. Fields without
+            any matching subfields are skipped.
+        clean is a function applied to each value, or None.
+
+    combine is a function applied to the list of all values for the element
+    before they are output, or None.
+    """
+
+    mappings = [
+        ('{http://id.loc.gov/ontologies/bibframe/}Local', [
+            ('print',   ('001',), None, None, None,
+             lambda v: 'http://pi.lib.uchicago.edu/1001/cat/bib/{}'.format(v))
+        ], lambda values: values[:1]),
+        # left out, like the other elements, when the print record has no
+        # 929 $a.
+        ('{http://id.loc.gov/ontologies/bibframe/}ClassificationLcc', [
+            ('print',   ('929',), 'a', None, None, None)
+        ], lambda values: values[:1]),
+        ('{http://id.loc.gov/ontologies/bibframe/}coordinates', [
+            ('digital', ('034',), 'defg', None, None, None)
+        ], lambda values: [convert_034_coords_to_marc_rda(' '.join(values))] if values else []),
+        ('{http://purl.org/dc/terms/}accessRights', [
+            ('digital', ('506',), MARC_LOWERCASE_SUBFIELDS, None, ' '.join, None)
+        ], None),
+        ('{http://purl.org/dc/terms/}alternative', [
+            ('digital', ('246',), MARC_LOWERCASE_SUBFIELDS, None, ' '.join, None)
+        ], None),
+        ('{http://www.loc.gov/mads/rdf/v1#}ConferenceName', [
+            ('digital', ('111',), MARC_LOWERCASE_SUBFIELDS, None, ' '.join, None)
+        ], None),
+        ('{http://www.loc.gov/mads/rdf/v1#}CorporateName', [
+            ('digital', ('110',), MARC_LOWERCASE_SUBFIELDS, None, ' '.join, None),
+            ('digital', ('710',), 'a', None, None, remove_marc_punctuation)
+        ], None),
+        ('{http://purl.org/dc/elements/1.1/}coverage', [
+            ('digital', ('651',), 'a', is_fast_geographic_heading, None, remove_marc_punctuation)
+        ], None),
+        ('{http://purl.org/dc/terms/}dateCopyrighted', [
+            ('digital', ('264',), 'c', lambda f: f.indicator2 == '4', None, None)
+        ], None),
+        ('{http://purl.org/dc/elements/1.1/}description', [
+            ('digital', ('500', '538'), MARC_LOWERCASE_SUBFIELDS, None, ' '.join, None)
+        ], None),
+        ('{http://purl.org/dc/elements/1.1/}format', [
+            ('digital', ('255',), 'b', None, None, None),
+            ('print',   ('300',), 'ac', None, None, None)
+        ], lambda values: [remove_marc_punctuation(v) for v in sorted_set(values)]),
+        ('{http://purl.org/dc/terms/}hasFormat', [
+            ('digital', ('776',), 'i', None, None, remove_marc_punctuation)
+        ], None),
+        ('{http://purl.org/dc/elements/1.1/}identifier', [
+            lambda dc: ['ark:/61001/{}'.format(dc.noid)]
+        ], None),
+        ('{http://id.loc.gov/ontologies/bibframe/}ISBN', [
+            ('digital', ('020',), MARC_LOWERCASE_SUBFIELDS, None, None, None)
+        ], None),
+        ('{http://id.loc.gov/ontologies/bibframe/}ISSN', [
+            ('digital', ('022',), MARC_LOWERCASE_SUBFIELDS, None, None, None)
+        ], None),
+        ('{http://purl.org/dc/terms/}isPartOf', [
+            ('digital', ('700',), 'a', lambda f: f['t'] is not None, None, None),
+            ('digital', ('830',), MARC_LOWERCASE_SUBFIELDS, None, None, None)
+        ], None),
+        ('{http://purl.org/dc/terms/}issued', [
+            ('digital', ('260',), 'c', None, None, process_date_string),
+            ('digital', ('264',), 'c', lambda f: f.indicator2 == '1', None, process_date_string)
+        ], sorted_set),
+        ('{http://purl.org/dc/elements/1.1/}language', [
+            ('digital', ('008',), None, None, None,
+             lambda v: MARC_CODE_LIST_FOR_LANGUAGES[v[35:38]])
+        ], None),
+        ('{http://purl.org/dc/elements/1.1/}medium', [
+            ('digital', ('338',), MARC_LOWERCASE_SUBFIELDS, None, ' '.join, None)
+        ], None),
+        ('{http://www.loc.gov/mads/rdf/v1#}PersonalName', [
+            ('digital', ('100',), 'a', None, ' '.join, None),
+            ('digital', ('700',), 'a', lambda f: f['t'] is None, None, remove_marc_punctuation)
+        ], None),
+        ('{http://id.loc.gov/ontologies/bibframe/}place', [
+            ('digital', ('260',), 'a', None, None, remove_marc_punctuation),
+            ('digital', ('264',), 'a', lambda f: f.indicator2 == '1', None, remove_marc_punctuation)
+        ], sorted_set),
+        ('{http://purl.org/dc/elements/1.1/}publisher', [
+            ('digital', ('260',), 'b', None, None, remove_marc_punctuation),
+            ('digital', ('264',), 'b', lambda f: f.indicator2 == '1', None, remove_marc_punctuation)
+        ], None),
+        ('{http://purl.org/dc/elements/1.1/}relation', [
+            ('digital', ('730',), 'a', None, None, None)
+        ], None),
+        ('{http://id.loc.gov/ontologies/bibframe/}scale', [
+            ('digital', ('255',), 'a', None, None, None)
+        ], None),
+        ('{http://purl.org/dc/terms/}spatial', [
+            ('digital', ('651',), 'az', is_fast_geographic_heading,
+             lambda sf: [remove_marc_punctuation(s) for s in sf], None)
+        ], lambda values: [' -- '.join(s) for s in remove_subsets(values)]),
+        ('{http://purl.org/dc/elements/1.1/}subject', [
+            ('digital', ('650',), 'ax', None, None, remove_marc_punctuation)
+        ], sorted_set),
+        ('{http://purl.org/dc/terms/}temporal', [
+            ('digital', ('650',), 'y', None, None, None)
+        ], None),
+        ('{http://purl.org/dc/elements/1.1/}title', [
+            ('digital', ('245',), 'ab', None, ' '.join, None)
+        ], None),
+        ('{http://www.loc.gov/mods/v3/}titleUniform', [
+            ('digital', ('130', '240'), MARC_LOWERCASE_SUBFIELDS, None, ' '.join, None)
+        ], None),
+        ('{http://purl.org/dc/elements/1.1/}type', [
+            ('digital', ('336',), 'a', None, None, remove_marc_punctuation),
+            ('digital', ('650', '651'), 'v', None, None, remove_marc_punctuation),
+            ('digital', ('655',), MARC_LOWERCASE_SUBFIELDS,
+             lambda f: f['2'] == 'fast', None, remove_marc_punctuation)
+        ], sorted_set)
+    ]
+
+    plan = compile_dc_mappings(mappings)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'mappings' in cls.__dict__:
+            cls.plan = compile_dc_mappings(cls.mappings)
+
     def __init__(self, digital_record, print_record, noid):
         """
             digital_record_id: identifier for the digital record.
@@ -296,6 +2014,9 @@ class MarcXmlToDc:
         self.print_record = print_record
         self.noid = noid
 
+        self._metadata = None
+        self._values = None
+
         ElementTree.register_namespace(
             'bf', 'http://id.loc.gov/ontologies/bibframe/')
         ElementTree.register_namespace(
@@ -313,374 +2034,88 @@ class MarcXmlToDc:
         Returns:
             list
         """
-        values = []
-        for e in self._asxml().findall(
-	    '{{http://purl.org/dc/elements/1.1/}}{}'.format(attr.replace('_','.'))
-        ):
-            values.append(e.text)
-        for e in self._asxml().findall(
-	    '{{http://purl.org/dc/terms/}}{}'.format(attr.replace('_','.'))
-        ):
-            values.append(e.text)
-        return sorted(values)
-
-    def _asxml(self):
-        def process_subject(s):
-            if s[-1] == '.':
-                return s[:-1]
-            else:
-                return s
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        values = self._get_values()
+        return sorted(
+            values.get(
+                '{{http://purl.org/dc/elements/1.1/}}{}'.format(attr.replace('_','.')),
+                []
+            ) +
+            values.get(
+                '{{http://purl.org/dc/terms/}}{}'.format(attr.replace('_','.')),
+                []
+            )
+        )
 
-        metadata = ElementTree.Element('metadata')
+    def _get_metadata(self):
+        """Build the metadata tree on first use and reuse it afterwards. The
+        records are not expected to change once the converter exists.
 
-        # bf:Local
-        ElementTree.SubElement(
-            metadata,
-            '{http://id.loc.gov/ontologies/bibframe/}Local'
-        ).text = 'http://pi.lib.uchicago.edu/1001/cat/bib/{}'.format(
-            self.print_record['001'].value()
-        )
+        Returns:
+            xml.etree.ElementTree.Element
+        """
+        if self._metadata is None:
+            self._metadata = self._asxml()
+        return self._metadata
 
-        # bf:ClassificationLcc
-        ElementTree.SubElement(
-            metadata,
-            '{http://id.loc.gov/ontologies/bibframe/}ClassificationLcc'
-        ).text = self.print_record['929']['a']
-
-        # bf:coordinates
-        coordinates = []
-        for f in self.digital_record.get_fields('034'):
-            for sf in f.get_subfields('d', 'e', 'f', 'g'):
-                coordinates.append(sf)
-        if coordinates: 
-            ElementTree.SubElement(
-                metadata,
-                '{http://id.loc.gov/ontologies/bibframe/}coordinates'
-            ).text = convert_034_coords_to_marc_rda(
-                ' '.join(coordinates)
-            )
+    def _get_values(self):
+        """Index the text of every element in the metadata tree by tag.
 
-        # dcterms:accessRights
-        for f in self.digital_record.get_fields('506'):
-            sf = f.get_subfields(*list(string.ascii_lowercase))
-            if sf:
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://purl.org/dc/terms/}accessRights'
-                ).text = ' '.join(sf)
-
-        # dcterms:alternative
-        for f in self.digital_record.get_fields('246'):
-            sf = f.get_subfields(*list(string.ascii_lowercase))
-            if sf:
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://purl.org/dc/terms/}alternative'
-                ).text = ' '.join(sf)
-
-        # madsrdf:ConferenceName
-        for f in self.digital_record.get_fields('111'):
-            sf = f.get_subfields(*list(string.ascii_lowercase))
-            if sf:
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://www.loc.gov/mads/rdf/v1#}ConferenceName'
-                ).text = ' '.join(sf)
-
-        # madsrdf:CorporateName
-        for f in self.digital_record.get_fields('110'):
-            sf = f.get_subfields(*list(string.ascii_lowercase))
-            if sf:
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://www.loc.gov/mads/rdf/v1#}CorporateName'
-                ).text = ' '.join(sf)
-
-        for f in self.digital_record.get_fields('710'):
-            for sf in f.get_subfields('a'):
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://www.loc.gov/mads/rdf/v1#}CorporateName'
-                ).text = remove_marc_punctuation(sf)
-
-        # dc:coverage
-        for f in self.digital_record.get_fields('651'):
-            if f.indicator2 == '7' and f['2'] == 'fast':
-                for sf in f.get_subfields('a'):
-                    ElementTree.SubElement(
-                        metadata,
-                        '{http://purl.org/dc/elements/1.1/}coverage'
-                    ).text = remove_marc_punctuation(sf)
-
-        # dcterms:dateCopyrighted
-        for f in self.digital_record.get_fields('264'):
-            if f.indicator2 == '4':
-                for sf in f.get_subfields('c'):
-                    ElementTree.SubElement(
-                        metadata,
-                        '{http://purl.org/dc/terms/}dateCopyrighted'
-                    ).text = sf
-
-        # dc:description
-        for n in ('500', '538'):
-            for f in self.digital_record.get_fields(n):
-                sf = f.get_subfields(*list(string.ascii_lowercase))
-                if sf:
-                    ElementTree.SubElement(
-                        metadata,
-                        '{http://purl.org/dc/elements/1.1/}description'
-                    ).text = ' '.join(sf)
+        Returns:
+            dict: of element tags to lists of strings, in document order.
+        """
+        if self._values is None:
+            self._values = {}
+            for e in self._get_metadata():
+                self._values.setdefault(e.tag, []).append(e.text)
+        return self._values
 
-        # dc:format
-        formats = set()
-        for f in self.digital_record.get_fields('255'):
-            for sf in f.get_subfields('b'):
-                formats.add(sf)
-        for f in self.print_record.get_fields('300'):
-            for sf in f.get_subfields('a', 'c'):
-                formats.add(sf)
-        for f in sorted(list(formats)):
-            ElementTree.SubElement(
-                metadata,
-                '{http://purl.org/dc/elements/1.1/}format'
-            ).text = remove_marc_punctuation(f)
-
-        # dcterms:hasFormat
-        for f in self.digital_record.get_fields('776'):
-            for sf in f.get_subfields('i'):
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://purl.org/dc/terms/}hasFormat'
-                ).text = remove_marc_punctuation(sf)
-
-        # dc:identifier
-        ElementTree.SubElement(
-            metadata,
-            '{http://purl.org/dc/elements/1.1/}identifier'
-        ).text = 'ark:/61001/{}'.format(self.noid)
-
-        # bf:ISBN
-        for n in ('020'):
-            for f in self.digital_record.get_fields(n):
-                for sf in f.get_subfields(*list(string.ascii_lowercase)):
-                    ElementTree.SubElement(
-                        metadata,
-                        '{http://id.loc.gov/ontologies/bibframe/}ISBN'
-                    ).text = sf
-
-        # bf:ISSN
-        for n in ('022'):
-            for f in self.digital_record.get_fields(n):
-                for sf in f.get_subfields(*list(string.ascii_lowercase)):
-                    ElementTree.SubElement(
-                        metadata,
-                        '{http://id.loc.gov/ontologies/bibframe/}ISSN'
-                    ).text = sf
-
-        # dcterms:isPartOf
-        for f in self.digital_record.get_fields('700'):
-            if f['t'] is not None:
-                for sf in f.get_subfields('a'):
-                    ElementTree.SubElement(
-                        metadata,
-                        '{http://purl.org/dc/terms/}isPartOf'
-                    ).text = sf
-
-        for f in self.digital_record.get_fields('830'):
-            for sf in f.get_subfields(*list(string.ascii_lowercase)):
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://purl.org/dc/terms/}isPartOf'
-                ).text = sf
-
-        # dcterms:issued
-        issued = set()
-        for f in self.digital_record.get_fields('260'):
-            for sf in f.get_subfields('c'):
-                issued.add(process_date_string(sf))
-        for f in self.digital_record.get_fields('264'):
-            if f.indicator2 == '1':
-                for sf in f.get_subfields('c'):
-                    issued.add(process_date_string(sf))
-        if issued:
-            for i in sorted(list(issued)):
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://purl.org/dc/terms/}issued'
-                ).text = i
-
-        # dc:language
-        # get language from specific character positions in the 008. 
-        # see https://www.loc.gov/marc/languages/ for a lookup table. 
-        marc_code_list_for_languages = {
-            'eng': 'en'
-        }
+    def _asxml(self):
+        """Build Dublin Core metadata by filling in the mapping plan with a
+        single pass over the fields of each record.
 
-        for f in self.digital_record.get_fields('008'):
-            ElementTree.SubElement(
-                metadata,
-                '{http://purl.org/dc/elements/1.1/}language'
-            ).text = marc_code_list_for_languages[f.value()[35:38]]
-
-        # dc:medium
-        for f in self.digital_record.get_fields('338'):
-            sf = f.get_subfields(*list(string.ascii_lowercase))
-            if sf:
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://purl.org/dc/elements/1.1/}medium'
-                ).text = ' '.join(sf)
-
-        # madsrdf:PersonalName
-        for f in self.digital_record.get_fields('100'):
-            sf = f.get_subfields('a')
-            if sf:
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://www.loc.gov/mads/rdf/v1#}PersonalName'
-                ).text = ' '.join(sf)
-
-        for f in self.digital_record.get_fields('700'):
-            if f['t'] is None:
-                for sf in f.get_subfields('a'):
-                    ElementTree.SubElement(
-                        metadata,
-                        '{http://www.loc.gov/mads/rdf/v1#}PersonalName'
-                    ).text = remove_marc_punctuation(sf)
-
-        # bf:place
-        places = set()
-        for f in self.digital_record.get_fields('260'):
-            for sf in f.get_subfields('a'):
-                places.add(remove_marc_punctuation(sf))
-
-        for f in self.digital_record.get_fields('264'):
-            if f.indicator2 == '1':
-                for sf in f.get_subfields('a'):
-                    places.add(remove_marc_punctuation(sf))
-
-        for p in sorted(list(places)):
-            ElementTree.SubElement(
-                metadata,
-                '{http://id.loc.gov/ontologies/bibframe/}place'
-            ).text = p
-
-        # dc:publisher
-        for f in self.digital_record.get_fields('260'):
-            for sf in f.get_subfields('b'):
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://purl.org/dc/elements/1.1/}publisher'
-                ).text = remove_marc_punctuation(sf)
-
-        for f in self.digital_record.get_fields('264'):
-            if f.indicator2 == '1':
-                for sf in f.get_subfields('b'):
-                    ElementTree.SubElement(
-                        metadata,
-                        '{http://purl.org/dc/elements/1.1/}publisher'
-                    ).text = remove_marc_punctuation(sf)
-
-        # dc:relation
-        for f in self.digital_record.get_fields('730'):
-            for sf in f.get_subfields('a'):
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://purl.org/dc/elements/1.1/}relation'
-                ).text = sf
-
-        # bf:scale
-        for f in self.digital_record.get_fields('255'):
-            for sf in f.get_subfields('a'):
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://id.loc.gov/ontologies/bibframe/}scale'
-                ).text = sf
-
-        # dcterms:spatial
-        spatials = []
-        for f in self.digital_record.get_fields('651'):
-            spatial = []
-            if f.indicator2 == '7' and f['2'] == 'fast':
-                for sf in f.get_subfields('a', 'z'):
-                    spatial.append(remove_marc_punctuation(sf))
-            spatials.append(spatial)
-
-        spatials = remove_subsets(spatials)
-
-        for s in spatials:
-            ElementTree.SubElement(
-                metadata,
-                '{http://purl.org/dc/terms/}spatial'
-            ).text = ' -- '.join(s)
-
-        # dc:subject
-        subjects = set()
-        for f in self.digital_record.get_fields('650'):
-            for sf in f.get_subfields('a', 'x'):
-                subjects.add(remove_marc_punctuation(sf))
-
-        for s in sorted(list(subjects)):
-            ElementTree.SubElement(
-                metadata,
-                '{http://purl.org/dc/elements/1.1/}subject'
-            ).text = s
-
-        # dcterms:temporal
-        for f in self.digital_record.get_fields('650'):
-            for sf in f.get_subfields('y'):
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://purl.org/dc/terms/}temporal'
-                ).text = sf
-
-        # dc:title
-        for f in self.digital_record.get_fields('245'):
-            title = []
-            for sf in f.get_subfields('a', 'b'):
-                title.append(sf)
-            if title:
-                ElementTree.SubElement(
-                    metadata,
-                    '{http://purl.org/dc/elements/1.1/}title'
-                ).text = ' '.join(title)
-
-        # mods:titleUniform
-        for n in ('130', '240'):
-            for f in self.digital_record.get_fields(n):
-                sf = f.get_subfields(*list(string.ascii_lowercase))
-                if sf:
-                    ElementTree.SubElement(
-                        metadata,
-                        '{http://www.loc.gov/mods/v3/}titleUniform'
-                    ).text = ' '.join(sf)
-
-        # dc:type
-        types = set()
-        for f in self.digital_record.get_fields('336'):
-            for sf in f.get_subfields('a'):
-                types.add(remove_marc_punctuation(sf))
-
-        for n in ('650', '651'):
-            for f in self.digital_record.get_fields(n): 
-                for sf in f.get_subfields('v'):
-                    types.add(remove_marc_punctuation(sf))
-
-        for f in self.digital_record.get_fields('655'):
-            if f['2'] == 'fast':
-                for sf in f.get_subfields(*list(string.ascii_lowercase)):
-                    types.add(remove_marc_punctuation(sf))
-
-        for t in sorted(list(types)):
-            ElementTree.SubElement(
-                metadata,
-                '{http://purl.org/dc/elements/1.1/}type'
-            ).text = t
+        Returns:
+            xml.etree.ElementTree.Element
+        """
+        fields_by_tag, rows, slot_count = self.plan
+
+        slots = [[] for _ in range(slot_count)]
+        for record_name, record in (('digital', self.digital_record),
+                                    ('print',   self.print_record)):
+            for field in record.fields:
+                for slot, subfields, condition, group, clean in \
+                        fields_by_tag.get((record_name, field.tag), ()):
+                    if condition and not condition(field):
+                        continue
+                    if subfields is None:
+                        values = [field.value()]
+                    else:
+                        values = field.get_subfields(*subfields)
+                    if group:
+                        if not values:
+                            continue
+                        values = [group(values)]
+                    if clean:
+                        values = [clean(v) for v in values]
+                    slots[slot].extend(values)
 
+        metadata = ElementTree.Element('metadata')
+        for element, sources, combine in rows:
+            values = []
+            for source in sources:
+                if callable(source):
+                    values.extend(source(self))
+                else:
+                    values.extend(slots[source])
+            if combine:
+                values = combine(values)
+            for value in values:
+                ElementTree.SubElement(metadata, element).text = value
         return metadata
-            
+
     def __str__(self):
-        return ElementTree.tostring(self._asxml(), 'utf-8', method='xml').decode('utf-8')
+        return ElementTree.tostring(self._get_metadata(), 'utf-8', method='xml').decode('utf-8')
 
 
 class DigitalMediaArchiveFilemakerToDc:
@@ -689,40 +2124,300 @@ class DigitalMediaArchiveFilemakerToDc:
 
 
 class SocSciMapsMarcXmlToDc(MarcXmlToDc):
-    def _asxml(self):
-        metadata = super()._asxml()
-
-        # remove dc:coverage
-        for c in metadata.findall('{http://purl.org/dc/elements/1.1/}coverage'):
-            metadata.remove(c)
-
-        # remove dc:medium
-        for s in metadata.findall('{http://purl.org/dc/elements/1.1/}medium'):
-            metadata.remove(s)
-
-        # remove existing dc:type elements, then add only the ones we
-        # want back.
-        for t in metadata.findall('{http://purl.org/dc/elements/1.1/}type'):
-            metadata.remove(t)
-
-        types = set()
-        for n in ('650', '651'):
-            for f in self.digital_record.get_fields(n):
-                for sf in f.get_subfields('v'):
-                    types.add(remove_marc_punctuation(sf))
-
-        for f in self.digital_record.get_fields('655'):
-            if f['2'] == 'fast':
-                for sf in f.get_subfields(*list(string.ascii_lowercase)):
-                    types.add(remove_marc_punctuation(sf))
-
-        for t in sorted(list(types)):
-            ElementTree.SubElement(
-                metadata,
-                '{http://purl.org/dc/elements/1.1/}type'
-            ).text = t
+    # leave out dc:coverage and dc:medium, and don't take dc:type from the
+    # 336.
+    mappings = override_mappings(MarcXmlToDc.mappings, {
+        '{http://purl.org/dc/elements/1.1/}coverage': None,
+        '{http://purl.org/dc/elements/1.1/}medium': None,
+        '{http://purl.org/dc/elements/1.1/}type': ([
+            ('digital', ('650', '651'), 'v', None, None, remove_marc_punctuation),
+            ('digital', ('655',), MARC_LOWERCASE_SUBFIELDS,
+             lambda f: f['2'] == 'fast', None, remove_marc_punctuation)
+        ], sorted_set)
+    })
+
+
+class SocSciMapsMarcXmlToEDM(DigitalCollectionToEDM):
+    """A class to convert MARCXML to Europeana Data Model (EDM)."""
+    def __init__(self, digital_record, print_record, noid, master_file_metadata, graph=None):
+        """Initialize an instance of the class MarcXmlToEDM.
 
-        return metadata
+        Args:
+            graph (Graph or NTriplesSink): optional, where to add triples. By
+                default a new Graph.
+        """
+        super().__init__(graph)
+        self.digital_record = digital_record
+        self.print_record = print_record
+        self.dc = SocSciMapsMarcXmlToDc(digital_record, print_record, noid)
+        self.noid = noid
+        self.master_file_metadata = master_file_metadata
+
+        if isinstance(self.dc.identifier, list):
+            self.identifier = self.dc.identifier[0]
+        else:
+            self.identifier = self.dc.identifier
+
+        self.short_id = self.identifier.replace('http://pi.lib.uchicago.edu/1001', '')
+
+        self.agg = ARK['{}/aggregation'.format(self.noid)]
+        self.cho = ARK['{}'.format(self.noid)]
+        self.pro = ARK['{}/file.xml'.format(self.noid)]
+        self.rem = ARK['{}/rem'.format(self.noid)]
+        self.wbr = ARK['{}/file.tif'.format(self.noid)]
+
+        self.now = Literal(datetime.datetime.utcnow(), datatype=XSD.dateTime)
+
+    def build_item_triples(self):
+        """Add triples for an individual item.
+
+        Aggregations exist because things on the web like web sites or
+        collections of web pages actually include several resources, even
+        though we refer to them by a single resource, like a home page.
+        See the ORE Primer (http://www.openarchives.org/ore/1.0/primer)
+        for more information. This is a bit abstract in the case of the social
+        scientist maps, where the model currently includes a single web page 
+        per map. 
+
+        The Cultural Heritage Object is the map itself.
+
+        Side Effect:
+            Add triples to self.graph
+        """
+        # aggregation for the item.
+        self.graph.add((self.agg, RDF.type,                         terms.term(ORE, 'Aggregation')))
+        self.graph.add((self.agg, terms.term(EDM, 'aggregatedCHO'), self.cho))
+        self.graph.add((self.agg, terms.term(EDM, 'dataProvider'),  terms.literal('University of Chicago Library')))
+        self.graph.add((self.agg, terms.term(ORE, 'isDescribedBy'), self.rem))
+        self.graph.add((self.agg, terms.term(EDM, 'isShownBy'),     self.wbr))
+        self.graph.add((self.agg, terms.term(EDM, 'object'),        self.wbr))
+        self.graph.add((self.agg, terms.term(EDM, 'provider'),      terms.literal('University of Chicago Library')))
+        self.graph.add((self.agg, terms.term(EDM, 'rights'),        terms.uri('http://creativecommons.org/licenses/by-sa/4.0/')))
+
+        self._build_cho()
+
+        # proxy for the item.
+        self.graph.add((self.pro, RDF.type,                  terms.term(ORE, 'Proxy')))
+        self.graph.add((self.pro, terms.term(DC, 'format'),  terms.literal('application/xml')))
+        self.graph.add((self.pro, terms.term(ORE, 'proxyFor'), self.cho))
+        self.graph.add((self.pro, terms.term(ORE, 'proxyIn'),  self.agg))
+
+        # resource map for the item.
+        self.graph.add((self.rem, terms.term(DCTERMS, 'created'),  self.now))
+        self.graph.add((self.rem, terms.term(DCTERMS, 'modified'), self.now))
+        self.graph.add((self.rem, terms.term(DCTERMS, 'creator'),  terms.uri('https://repository.lib.uchicago.edu/')))
+        self.graph.add((self.rem, RDF.type,                        terms.term(ORE, 'ResourceMap')))
+        self.graph.add((self.rem, terms.term(ORE, 'describes'),    self.agg))
+
+        self._build_web_resources()
+
+        # connect the item to its collection.
+        self.graph.add((self.CHISOC_CHO, terms.term(DCTERMS, 'hasPart'), self.cho))
+
+    def _build_cho(self):
+        """The cultural herigate object is the map itself. 
+
+        This method adds triples that describe the cultural heritage object.
+
+        Args:
+            agg (URIRef): aggregation 
+            cho (URIRef): cultural heritage object
+
+        Side Effect:
+            Add triples to self.graph
+        """
+
+        self.graph.add((self.cho, RDF.type, terms.term(EDM, 'ProvidedCHO')))
+        for ns, name, obj_str in (
+            (BF,      'ClassificationLcc', '{http://id.loc.gov/ontologies/bibframe/}ClassificationLcc'),
+            (MADSRDF, 'ConferenceName',    '{http://www.loc.gov/mads/rdf/v1#}ConferenceName'),
+            (MADSRDF, 'CorporateName',     '{http://www.loc.gov/mads/rdf/v1#}CorporateName'),
+            (DC,      'coverage',          '{http://purl.org/dc/elements/1.1/}coverage'),
+            (DC,      'creator',           '{http://purl.org/dc/elements/1.1/}creator'),
+            (DC,      'description',       '{http://purl.org/dc/elements/1.1/}description'),
+            (DC,      'extent',            '{http://purl.org/dc/elements/1.1/}extent'),
+            (DCTERMS, 'hasFormat',         '{http://purl.org/dc/terms/}hasFormat'),
+            (DC,      'identifier',        '{http://purl.org/dc/elements/1.1/}identifier'),
+            (DC,      'language',          '{http://purl.org/dc/elements/1.1/}language'),
+            (BF,      'Local',             '{http://id.loc.gov/ontologies/bibframe/}Local'),
+            (MADSRDF, 'PersonalName',      '{http://www.loc.gov/mads/rdf/v1#}PersonalName'),
+            (BF,      'place',             '{http://id.loc.gov/ontologies/bibframe/}place'),
+            (DC,      'publisher',         '{http://purl.org/dc/elements/1.1/}publisher'),
+            (DC,      'rights',            '{http://purl.org/dc/elements/1.1/}rights'),
+            (BF,      'scale',             '{http://id.loc.gov/ontologies/bibframe/}scale'),
+            (DCTERMS, 'spatial',           '{http://purl.org/dc/terms/}spatial'),
+            (DC,      'subject',           '{http://purl.org/dc/elements/1.1/}subject'),
+            (DC,      'title',             '{http://purl.org/dc/elements/1.1/}title'),
+            (DC,      'type',              '{http://purl.org/dc/elements/1.1/}type'),
+            (ERC,     'what',              '{http://purl.org/dc/elements/1.1/}title'),
+            (ERC,     'who',               '{http://www.loc.gov/mads/rdf/v1#}ConferenceName'),
+            (ERC,     'who',               '{http://www.loc.gov/mads/rdf/v1#}CorporateName'),
+            (ERC,     'who',               '{http://www.loc.gov/mads/rdf/v1#}PersonalName')
+        ):
+            for dc_obj_el in self.dc._get_metadata().findall(obj_str):
+                self.graph.add((self.cho, terms.term(ns, name), Literal(dc_obj_el.text)))
+
+        # dc:date
+        d = []
+
+        for f in self.digital_record.get_fields('260', '264'):
+            for sf in f.get_subfields('c'):
+                d.append(sf)
+        if d:
+            self.graph.add((self.cho, terms.term(DC, 'date'),  Literal(process_date_string(d[0]))))
+            self.graph.add((self.cho, terms.term(EDM, 'year'), Literal(process_date_string(d[0]))))
+            self.graph.add((self.cho, terms.term(ERC, 'when'), Literal(process_date_string(d[0]))))
+
+        # dc:format
+        for dc_obj_el in self.dc._get_metadata().findall('{http://purl.org/dc/elements/1.1/}format'):
+            self.graph.add((self.cho, terms.term(DC, 'format'), Literal(dc_obj_el.text)))
+
+        # dc:rights
+        self.graph.add((self.cho, terms.term(DC, 'rights'), terms.uri('http://creativecommons.org/licenses/by-sa/4.0/')))
+
+        self.graph.add((self.cho, terms.term(DCTERMS, 'isPartOf'),    terms.uri('https://repository.lib.uchicago.edu/digital_collections/maps/chisoc')))
+        self.graph.add((self.cho, terms.term(EDM, 'currentLocation'), terms.literal('Map Collection Reading Room (Room 370)')))
+        self.graph.add((self.cho, terms.term(EDM, 'type'),            terms.literal('IMAGE')))
+        self.graph.add((self.cho, terms.term(ERC, 'where'),           self.cho))
+
+    def _build_web_resources(self):
+        for metadata in self.master_file_metadata:
+            self.graph.add((self.wbr, RDF.type, terms.term(EDM, 'WebResource')))
+            for p, o in (
+                ('http://www.loc.gov/premis/rdf/v1#hasIdentifierType',         terms.literal('ark:/61001')),
+                ('http://www.loc.gov/premis/rdf/v1#hasIdentifierValue',        Literal(ARK['{}/file.tif'.format(self.noid)])),
+                ('http://www.loc.gov/premis/rdf/v3/compositionLevel',          terms.literal(0)),
+                ('http://www.loc.gov/premis/rdf/v1#hasMessageDigestAlgorithm', terms.literal('SHA-512')),
+                ('http://www.loc.gov/premis/rdf/v1#hasMessageDigest',          Literal(metadata['sha512'])),
+                ('http://www.loc.gov/premis/rdf/v3/size',                      Literal(metadata['size'])),
+                ('http://www.loc.gov/premis/rdf/v1#hasFormatName',             terms.literal('image/tiff')),
+                ('http://www.loc.gov/premis/rdf/v3/originalName',              Literal(metadata['name'])),
+                ('http://www.loc.gov/premis/rdf/v3/restriction',               terms.literal('None')),
+                ('http://purl.org/dc/elements/1.1/format',                     terms.literal('image/tiff'))):
+                self.graph.add((self.wbr, terms.uri(p), o))
+            mix_graph(self.graph, self.wbr, metadata)
+
+    @classmethod
+    def build_map_collection_triples(self, graph):
+        """Add triples for the map collections itself, and to connect items with each other. 
+
+        Args:
+            graph (Graph or NTriplesSink): where to add triples.
+
+        Side Effect:
+            Add triples to graph
+        """
+ 
+        now = Literal(datetime.datetime.utcnow(), datatype=XSD.dateTime)
+
+        # resource map for the map collection 
+        graph.add((self.MAPS_REM, RDF.type,           ORE.ResourceMap))
+        graph.add((self.MAPS_REM, DCTERMS.created,    now))
+        graph.add((self.MAPS_REM, DCTERMS.creator,    URIRef('https://repository.lib.uchicago.edu/')))
+        graph.add((self.MAPS_REM, DCTERMS.modified,   now))
+        graph.add((self.MAPS_REM, ORE.describes,      self.MAPS_AGG))
+
+        # aggregation for the map collection
+        graph.add((self.MAPS_AGG, RDF.type,           ORE.Aggregation))
+        graph.add((self.MAPS_AGG, EDM.aggregatedCHO,  self.MAPS_CHO))
+        graph.add((self.MAPS_AGG, EDM.dataProvider,   Literal('University of Chicago Library')))
+        graph.add((self.MAPS_AGG, EDM.isShownAt,      self.MAPS_CHO))
+        graph.add((self.MAPS_AGG, EDM.object,         URIRef('https://repository.lib.uchicago.edu/digital_collections/maps/icon.png')))
+        graph.add((self.MAPS_AGG, EDM.provider,       Literal('University of Chicago Library')))
+        graph.add((self.MAPS_AGG, ORE.isDescribedBy,  self.MAPS_REM))
+
+        # cultural heritage object for the map collection
+        graph.add((self.MAPS_CHO, RDF.type,           EDM.ProvidedCHO))
+        graph.add((self.MAPS_CHO, DC.date,            Literal('2020')))
+        graph.add((self.MAPS_CHO, DC.title,           Literal('The University of Chicago Library Digital Repository')))
+        graph.add((self.MAPS_CHO, DCTERMS.hasPart,    self.CHISOC_CHO))
+        graph.add((self.MAPS_CHO, ERC.who,            Literal('University of Chicago Library')))
+        graph.add((self.MAPS_CHO, ERC.what,           Literal('The University of Chicago Library Digital Repository')))
+        graph.add((self.MAPS_CHO, ERC.when,           Literal('2020')))
+        graph.add((self.MAPS_CHO, ERC.where,          self.MAPS_CHO))
+        graph.add((self.MAPS_CHO, EDM.year,           Literal('2020')))
+
+    @classmethod
+    def build_socscimap_collection_triples(self, graph, items=()):
+        """Add triples for the social scientist map collection, and to connect items with each other. 
+
+        Args:
+            graph (Graph or NTriplesSink): where to add triples.
+            items (list): optional, the URIs of the collection's cultural
+                heritage objects, e.g. from EDMCollectionWriter.items.
+
+        Side Effect:
+            Add triples to graph
+        """
+ 
+        now = Literal(datetime.datetime.utcnow(), datatype=XSD.dateTime)
+
+        # resource map for the social scientists map collection
+        graph.add((self.CHISOC_REM, RDF.type,           ORE.ResourceMap))
+        graph.add((self.CHISOC_REM, DCTERMS.created,    now))
+        graph.add((self.CHISOC_REM, DCTERMS.creator,    URIRef('https://repository.lib.uchicago.edu/')))
+        graph.add((self.CHISOC_REM, ORE.describes,      self.CHISOC_AGG))
+
+        # aggregation for the social scientist maps collection
+        graph.add((self.CHISOC_AGG, RDF.type,           ORE.Aggregation))
+        graph.add((self.CHISOC_AGG, EDM.aggregatedCHO,  self.CHISOC_CHO))
+        graph.add((self.CHISOC_AGG, EDM.dataProvider,   Literal('University of Chicago Library')))
+        graph.add((self.CHISOC_AGG, EDM.isShownAt,      self.CHISOC_CHO))
+        graph.add((self.CHISOC_AGG, EDM.object,         URIRef('https://repository.lib.uchicago.edu/digital_collections/maps/chisoc/icon.png')))
+        graph.add((self.CHISOC_AGG, EDM.provider,       Literal('University of Chicago Library')))
+        graph.add((self.CHISOC_AGG, ORE.isDescribedBy,  self.CHISOC_REM))
+
+        # cultural heritage object for the social scientist maps collection
+        graph.add((self.CHISOC_CHO, RDF.type,           EDM.ProvidedCHO))
+        graph.add((self.CHISOC_CHO, DC.date,            Literal('2020')))
+        graph.add((self.CHISOC_CHO, DC.title,           Literal('The University of Chicago Library Digital Repository')))
+        graph.add((self.CHISOC_CHO, ERC.who,            Literal('University of Chicago Library')))
+        graph.add((self.CHISOC_CHO, ERC.what,           Literal('The University of Chicago Library Digital Repository')))
+        graph.add((self.CHISOC_CHO, ERC.when,           Literal('2020')))
+        graph.add((self.CHISOC_CHO, ERC.where,          self.CHISOC_CHO))
+        graph.add((self.CHISOC_CHO, EDM.year,           Literal('2020')))
+        for cho in items:
+            graph.add((self.CHISOC_CHO, DCTERMS.hasPart, cho))
+
+
+def compile_schema_dot_org_mappings(mappings):
+    """Turn a table of Schema.org mappings into a plan that can be filled in
+    with a single pass over a record's fields.
+
+    Args:
+        mappings (list): of (schema_element, [repeat_schema, marc_fields,
+            repeat_sf, strip_out]) rows, see MarcXmlToSchemaDotOrg.mappings.
+
+    Returns:
+        tuple: a dict of MARC tags to lists of (slot, subfield_match,
+            ind1_match, ind2_match) tuples, a list of (schema_element,
+            repeat_schema, repeat_sf, strip_out, slots) rows, and the number
+            of slots.
+    """
+    fields_by_tag = {}
+    rows = []
+    slot = 0
+    for schema_element, (repeat_schema, marc_fields, repeat_sf, strip_out) in mappings:
+        if repeat_schema == False:
+            assert repeat_sf == False
+        row_slots = []
+        for field_tag, subfield_code, ind1, ind2 in marc_fields:
+            fields_by_tag.setdefault(field_tag, []).append((
+                slot,
+                compile_pattern(subfield_code).match,
+                compile_pattern(ind1).match,
+                compile_pattern(ind2).match
+            ))
+            row_slots.append(slot)
+            slot += 1
+        rows.append((
+            schema_element,
+            repeat_schema,
+            repeat_sf,
+            compile_pattern(strip_out).sub if strip_out else None,
+            row_slots
+        ))
+    return fields_by_tag, rows, slot
 
 
 class MarcXmlToSchemaDotOrg(MarcXmlConverter):
@@ -775,16 +2470,12 @@ class MarcXmlToSchemaDotOrg(MarcXmlConverter):
         ('width',               [True,  [('300', 'c',     '.', '.')], False, None])
     ]
 
-    def __init__(self, marcxml):
-        """Initialize an instance of the class MarcToSchemaDotOrg.
+    plan = compile_schema_dot_org_mappings(mappings)
 
-        Args:
-            marcxml (str): a marcxml collection with a single record. 
-        """
-        for _, (repeat_dc, _, repeat_sf, _) in self.mappings:
-            if repeat_dc == False:
-                assert repeat_sf == False
-        super().__init__(marcxml)
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'mappings' in cls.__dict__:
+            cls.plan = compile_schema_dot_org_mappings(cls.mappings)
 
     def _get_creator(self):
         """Get creators from the 100, 110, or 111 fields if possible. 
@@ -828,39 +2519,45 @@ class MarcXmlToSchemaDotOrg(MarcXmlConverter):
             if dict_[k] == None:
                 dict_.pop(k)
 
-        for schema_element, (repeat_schema, marc_fields, repeat_sf, strip_out) in self.mappings:
+        fields_by_tag, rows, slot_count = self.plan
+
+        # walk the record once, sorting matching subfield text into a slot
+        # for each (tag, subfield, ind1, ind2) in the mappings.
+        slots = [[] for _ in range(slot_count)]
+        for tag, values in self.control_fields.items():
+            for slot, _, _, _ in fields_by_tag.get(tag, ()):
+                slots[slot].extend(values)
+        for tag, fields in self.data_fields.items():
+            targets = fields_by_tag.get(tag)
+            if targets is None:
+                continue
+            for ind1, ind2, subfields in fields:
+                for slot, subfield_match, ind1_match, ind2_match in targets:
+                    if ind1_match(ind1) and ind2_match(ind2):
+                        slots[slot].extend(
+                            text for code, text in subfields if subfield_match(code)
+                        )
+
+        for schema_element, repeat_schema, repeat_sf, strip_out, row_slots in rows:
             if repeat_schema:
-                field_texts = set() 
                 if repeat_sf:
-                    for marc_field in marc_fields:
-                        for field_text in self.get_marc_field(*marc_field):
-                            if strip_out:
-                                field_text = re.sub(strip_out, '', field_text)
-                            if field_text:
-                                field_texts.add(field_text)
-                    if len(field_texts) == 1:
-                        dict_[schema_element] = list(field_texts)[0]
-                    elif len(field_texts) > 1:
-                        dict_[schema_element] = sorted(field_texts)
+                    candidates = [t for slot in row_slots for t in slots[slot]]
                 else:
-                    for marc_field in marc_fields:
-                        field_text = ' '.join(self.get_marc_field(*marc_field))
-                        if strip_out:
-                            field_text = re.sub(strip_out, '', field_text)
-                        if field_text:
-                            field_texts.add(field_text)
-                    if len(field_texts) == 1:
-                        dict_[schema_element] = list(field_texts)[0]
-                    elif len(field_texts) > 1:
-                        dict_[schema_element] = sorted(field_texts)
+                    candidates = [' '.join(slots[slot]) for slot in row_slots]
+                field_texts = set()
+                for field_text in candidates:
+                    if strip_out:
+                        field_text = strip_out('', field_text)
+                    if field_text:
+                        field_texts.add(field_text)
+                if len(field_texts) == 1:
+                    dict_[schema_element] = field_texts.pop()
+                elif len(field_texts) > 1:
+                    dict_[schema_element] = sorted(field_texts)
             else:
-                field_text_arr = []
-                for marc_field in marc_fields:
-                    field_text_arr = field_text_arr + \
-                        self.get_marc_field(*marc_field)
-                field_text = ' '.join(field_text_arr)
+                field_text = ' '.join(t for slot in row_slots for t in slots[slot])
                 if strip_out:
-                    field_text = re.sub(strip_out, '', field_text)
+                    field_text = strip_out('', field_text)
                 if field_text:
                     dict_[schema_element] = field_text
         return dict_
@@ -879,8 +2576,6 @@ class MarcXmlToSchemaDotOrg(MarcXmlConverter):
 
 
 class MarcXmlToOpenGraph(MarcXmlConverter):
-    def __init__(self, marcxml):
-        self.dc = MarcToDc(marcxml)
     def __str__(self):
         html = '\n'.join(('<meta property="og:title" content="{{ og_title }}" >',
                         '<meta property="og:type" content="{{ og_type }}" >',
@@ -889,18 +2584,16 @@ class MarcXmlToOpenGraph(MarcXmlConverter):
                         '<meta property="og:description" content="{{ og_description }}" >',
                         '<meta property="og:site_name" content="{{ og_site_name }}" >'))
         return jinja2.Template(html).render(
-            og_description=self.dc.description[0],
+            og_description=self._get_description(),
             og_image='image',
             og_site_name='site_name',
-            og_title=self.dc.title[0],
+            og_title=self._get_title(),
             og_type='website',
             og_url='url'
         )
 
 
 class MarcXmlToTwitterCard(MarcXmlConverter):
-    def __init__(self, marcxml):
-        self.dc = MarcToDc(marcxml)
     def __str__(self):
         html = '\n'.join(('<meta name="twitter:card" content="{{ twitter_card }}" >',
                           '<meta name="twitter:site" content="{{ twitter_site }}" >',
@@ -911,10 +2604,10 @@ class MarcXmlToTwitterCard(MarcXmlConverter):
                           '<meta name="twitter:image:alt" content="{{ twitter_image_alt }}" >'))
         return jinja2.Template(html).render(
             twitter_card='card',
-            twitter_description=self.dc.description[0],
+            twitter_description=self._get_description(),
             twitter_image='image',
             twitter_image_alt='image_alt',
             twitter_site='site',
-            twitter_title=self.dc.title[0],
+            twitter_title=self._get_title(),
             twitter_url='url'
         )
@@ -1,12 +1,29 @@
 #!/usr/bin/env python
 """Usage:
     marc2dc --socscimaps <digital_record_id> --noid <noid>
+    marc2dc --socscimaps --batch <manifest> [--workers=<n>] [--output=<dir>]
+
+Options:
+  --batch          Convert every record pair in a manifest. Each line of the
+                   manifest is tab-delimited: the path to a binary MARC file
+                   for the digital record, the path to one for the print
+                   record, and a NOID. Output is in manifest order. Pairs
+                   that can't be converted are reported on stderr and
+                   skipped, and the exit status is 1.
+  --workers=<n>    Number of worker processes. Defaults to the number of
+                   CPUs.
+  --output=<dir>   Write each record to <dir>/<noid>.dc.xml instead of the
+                   terminal.
 """
 
-import io, json, os, paramiko, sys
+import collections, csv, io, json, multiprocessing, os, paramiko, sys, time
 import xml.etree.ElementTree as ElementTree
 
-from classes import SocSciMapsMarcXmlToDc
+try:
+    from .classes import SocSciMapsMarcXmlToDc
+except ImportError:
+    # run as a script, like the other converters in this directory.
+    from classes import SocSciMapsMarcXmlToDc
 from docopt import docopt
 from pymarc import MARCReader
 
@@ -48,11 +65,118 @@ def marc_to_dc_soc_sci(digital_record_id, noid):
 
     return str(SocSciMapsMarcXmlToDc(digital_record, print_record, noid))
 
-if __name__ == "__main__":
+def read_marc_record(path):
+    with open(path, 'rb') as fh:
+        for record in MARCReader(fh):
+            return record
+
+def read_manifest(path):
+    """Read a tab-delimited manifest of record pairs.
+
+    Returns:
+        list: of (digital_record_path, print_record_path, noid) tuples.
+            Rows with fewer than three columns are kept as they are, and
+            fail when they are converted.
+    """
+    with open(path) as f:
+        return [tuple(row[:3]) for row in csv.reader(f, delimiter='\t') if row]
+
+def convert_pair(pair):
+    """Convert one manifest entry in a worker process.
+
+    Args:
+        pair (tuple): digital record path, print record path, NOID.
+
+    Returns:
+        tuple: the NOID, DC as a string, the worker's process id, the
+            number of seconds the conversion took, and an error message.
+            If the pair can't be converted the DC is None, otherwise the
+            error is None. For a short manifest row the NOID is its last
+            column.
+    """
+    start = time.perf_counter()
+    noid = pair[-1]
+    try:
+        try:
+            digital_record_path, print_record_path, noid = pair
+        except ValueError:
+            raise ValueError('expected 3 columns, got {}'.format(len(pair)))
+        dc_str = str(SocSciMapsMarcXmlToDc(
+            read_marc_record(digital_record_path),
+            read_marc_record(print_record_path),
+            noid
+        ))
+        error = None
+    except Exception as e:
+        # one bad record shouldn't end the batch.
+        dc_str = None
+        error = '{}: {}'.format(type(e).__name__, e)
+    return noid, dc_str, os.getpid(), time.perf_counter() - start, error
+
+def marc_to_dc_soc_sci_batch(pairs, workers=None):
+    """Convert record pairs across a pool of worker processes.
+
+    Args:
+        pairs (list): of (digital_record_path, print_record_path, noid).
+        workers (int): number of processes, or None for one per CPU.
+
+    Returns:
+        generator: of (noid, dc_str, pid, seconds, error) tuples, as from
+            convert_pair(), in the same order as pairs.
+    """
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(pairs) // (workers * 4))
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(convert_pair, pairs, chunksize)
+
+def main():
     options = docopt(__doc__)
-    sys.stdout.write(
-        marc_to_dc_soc_sci(
-            options['<digital_record_id>'],
-            options['<noid>']
+
+    if options['--batch']:
+        pairs = read_manifest(options['<manifest>'])
+        workers = int(options['--workers']) if options['--workers'] else None
+
+        start = time.perf_counter()
+        worker_counts = collections.Counter()
+        worker_seconds = collections.Counter()
+        failed = 0
+        results = marc_to_dc_soc_sci_batch(pairs, workers)
+        for pair, (noid, dc_str, pid, seconds, error) in zip(pairs, results):
+            worker_counts[pid] += 1
+            worker_seconds[pid] += seconds
+            if error:
+                sys.stderr.write('failed {}: {}\n'.format('\t'.join(pair), error))
+                failed += 1
+                continue
+            if options['--output']:
+                with open(os.path.join(options['--output'], '{}.dc.xml'.format(noid)), 'w') as f:
+                    f.write(dc_str)
+            else:
+                sys.stdout.write(dc_str)
+                sys.stdout.write('\n')
+        elapsed = time.perf_counter() - start
+
+        for pid in sorted(worker_counts):
+            sys.stderr.write('worker {}: {} records, {:.0f} records/sec\n'.format(
+                pid,
+                worker_counts[pid],
+                worker_counts[pid] / worker_seconds[pid] if worker_seconds[pid] else 0
+            ))
+        sys.stderr.write('{} records in {:.2f}s ({:.0f} records/sec)\n'.format(
+            len(pairs),
+            elapsed,
+            len(pairs) / elapsed if elapsed else 0
+        ))
+        if failed:
+            sys.stderr.write('{} of {} records failed\n'.format(failed, len(pairs)))
+            sys.exit(1)
+    else:
+        sys.stdout.write(
+            marc_to_dc_soc_sci(
+                options['<digital_record_id>'],
+                options['<noid>']
+            )
         )
-    )
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,102 @@
 """Usage:
     marc2schemadotorg -
     marc2schemadotorg -f <path>
+    marc2schemadotorg --batch [--mrc] [--output=<output>] [<source>...]
+
 Options:
-  -h --help     Show this screen.
-  -f --file     File path to make manifest from
-  -             Take input from the terminal
+  -h --help          Show this screen.
+  -f --file          File path to make manifest from
+  -                  Take input from the terminal
+  --batch            Convert every record in one or more MARCXML collections,
+                     binary MARC (.mrc) files or directories of them, writing
+                     one JSON-LD document per line. Reads from the terminal
+                     if no path is given.
+  --mrc              Input from the terminal is binary MARC, not MARCXML.
+  --output=<output>  Write JSON-LD to this file instead of the terminal.
 """
 
 
-import sys
+import json, os, sys, time
 from docopt import docopt
-from . import MarcXmlToSchemaDotOrg
+from pymarc import MARCReader
+from . import iter_marcxml_records, MarcXmlToSchemaDotOrg
+
+def iter_mrc_records(fh):
+	"""Yield records from a binary MARC (ISO 2709) file.
+
+	Args:
+		fh (file): a binary file object.
+
+	Returns:
+		generator: of pymarc.Record, one per record.
+	"""
+	for record in MARCReader(fh, to_unicode=True, force_utf8=True):
+		if record is not None:
+			yield record
+
+def iter_path_records(path):
+	"""Yield records from a MARCXML collection, a binary MARC file, or a
+	directory containing either.
+
+	Args:
+		path (str): a file or directory path.
+
+	Returns:
+		generator: of MARCXML record elements or pymarc records, one per
+			record.
+	"""
+	if os.path.isdir(path):
+		for filename in sorted(os.listdir(path)):
+			if filename.endswith(('.mrc', '.xml')):
+				yield from iter_path_records(os.path.join(path, filename))
+	elif path.endswith('.mrc'):
+		with open(path, 'rb') as fh:
+			yield from iter_mrc_records(fh)
+	else:
+		yield from iter_marcxml_records(path)
+
+def batch(records, out):
+	"""Write one line of JSON-LD for each record.
+
+	Args:
+		records (iterable): of MARCXML record elements or pymarc records.
+		out (file): a text file object.
+
+	Returns:
+		tuple: the number of records converted and the elapsed seconds.
+	"""
+	start = time.perf_counter()
+	n = 0
+	for record in records:
+		out.write(json.dumps(MarcXmlToSchemaDotOrg(record)(), ensure_ascii=False))
+		out.write('\n')
+		n += 1
+	return n, time.perf_counter() - start
 
 def main():
 	options = docopt(__doc__)
 
+	if options['--batch']:
+		if options['<source>']:
+			records = (r for p in options['<source>'] for r in iter_path_records(p))
+		elif options['--mrc']:
+			records = iter_mrc_records(sys.stdin.buffer)
+		else:
+			records = iter_marcxml_records(sys.stdin.buffer)
+
+		if options['--output']:
+			with open(options['--output'], 'w', encoding='utf-8') as out:
+				n, elapsed = batch(records, out)
+		else:
+			n, elapsed = batch(records, sys.stdout)
+
+		sys.stderr.write('{} records in {:.2f}s ({:.0f} records/sec)\n'.format(
+			n,
+			elapsed,
+			n / elapsed if elapsed else 0
+		))
+		sys.exit()
+
 	if options['--file']:
 		with open(options['<path>'], 'r') as file:
 			marcxml = file.read()
@@ -1,5 +1,8 @@
 #!/usr/bin/env python
-"""Usage: mepa_edm <work_refid>
+"""Usage: mepa_edm <work_refid> [--ntriples]
+
+Options:
+  --ntriples  Write N-Triples as they are produced instead of Turtle.
 """
 
 import copy
@@ -13,19 +16,19 @@ from rdflib.namespace import RDF, DC, DCTERMS, XSD
 from classes import BASE, BF, EDM, ERC, MADSRDF, MIX, OAI, ORE, PREMIS, PREMIS2, PREMIS3, VRA
 from classes import REPOSITORY_AGG, REPOSITORY_CHO, REPOSITORY_REM 
 from classes import DIGCOL_AGG, DIGCOL_CHO, DIGCOL_REM 
-from classes import DigitalCollectionToEDM
+from classes import DigitalCollectionToEDM, get_xml_backend, NTriplesSink, turtle
 
 
 class MepaToEDM(DigitalCollectionToEDM):
     """A class to convert MEPA's Filemaker database to EDM."""
 
-    def __init__(self, vra, noid):
+    def __init__(self, vra, noid, graph=None):
         """Initialize an instance of the class MarcXmlToEDM.
 
         Args:
-            graph (Graph): a EDM graph collection from a single record.
+            graph (Graph or NTriplesSink): optional, where to add triples.
         """
-        super(MepaToEDM, self).__init__()
+        super(MepaToEDM, self).__init__(graph)
         self.graph.bind('vra', VRA)
         self.graph.bind('base', 'ark:61001/')
 
@@ -381,25 +384,29 @@ class MepaToEDM(DigitalCollectionToEDM):
         Returns:
             str
         """
-        return self.graph.serialize(format='turtle', base=BASE).decode("utf-8")
+        return turtle(self.graph, BASE)
 
 
 if __name__ == "__main__":
     options = docopt(__doc__)
 
+    xml_backend = get_xml_backend()
+
     # get input data.
-    tmp = ElementTree.parse('input/vcExport_v2.xml')
-    vra = ElementTree.Element('{http://www.vraweb.org/vracore4.htm}vra')
+    tmp = xml_backend.parse('input/vcExport_v2.xml')
+    vra = xml_backend.element('{http://www.vraweb.org/vracore4.htm}vra')
 
     # get the work.
-    for e in tmp.findall(
+    for e in xml_backend.xpath(
+        tmp,
         './/vra:work[@refid="{}"]'.format(options['<work_refid>']),
         {'vra': 'http://www.vraweb.org/vracore4.htm'}
     ):
         vra.append(copy.deepcopy(e))
 
     # get recto and verso.
-    for e in tmp.findall(
+    for e in xml_backend.xpath(
+        tmp,
         './/vra:relation[@refid="{}"]/../..'.format(options['<work_refid>']),
         {'vra': 'http://www.vraweb.org/vracore4.htm'}
     ):
@@ -407,8 +414,10 @@ if __name__ == "__main__":
 
     edm = MepaToEDM(
         vra,
-        'example'
+        'example',
+        NTriplesSink(sys.stdout) if options['--ntriples'] else None
     )
     edm.build_work_triples()
     edm.build_recto_verso_triples()
-    sys.stdout.write(edm.triples())
+    if not options['--ntriples']:
+        sys.stdout.write(edm.triples())
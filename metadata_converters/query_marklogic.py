@@ -1,57 +1,215 @@
 #!/usr/bin/env python
 """Usage:
-    query_marklogic <collection>
+    query_marklogic [--url=<url>] [--page-size=<n>] [--cache=<dir>] [--refresh] <collection>
+
+Export the triples in a collection as N-Triples. The collection is read a
+page at a time, ordered so that pages don't overlap, and each page is parsed
+as it arrives, so memory use doesn't depend on the size of the collection.
+Progress is reported on stderr.
+
+Exports are kept in a local cache, which report_graph and visualize_graph
+can read with --collection. Before using a cached export, the collection's
+triples are counted on the server, and the collection is downloaded again if
+the count has changed.
+
+Options:
+  -h --help           Show this screen.
+  --url=<url>         SPARQL endpoint.
+                      [default: http://marklogic.lib.uchicago.edu:8008/v1/graphs/sparql]
+  --page-size=<n>     Number of triples to request at once. [default: 10000]
+  --cache=<dir>       Cache directory. Defaults to $MARKLOGIC_CACHE, or
+                      ~/.cache/marklogic.
+  --refresh           Download the collection even if it is cached.
 """
 
-import json, os, requests, sys
+import codecs, json, os, requests, shutil, sys, time
 from docopt import docopt
+from rdflib import BNode, Literal, URIRef
 from requests.auth import HTTPBasicAuth
+try:
+    from .classes import CollectionCache, ntriples_term
+except ImportError:
+    # run as a script, like the other converters in this directory.
+    from classes import CollectionCache, ntriples_term
 
 # to delete all the triples from a collection, use the following curl
 # command:
 # curl --anyauth --user user:password -X DELETE http://server:port/v1/graphs?graph=collection
 
+def sparql_page_query(collection, limit, offset):
+    """Build a query for one page of the triples in a collection.
+
+    Returns:
+        str
+    """
+    return 'select ?s ?p ?o from <{}> where {{ ?s ?p ?o . }} ' \
+           'order by ?s ?p ?o limit {} offset {}'.format(collection, limit, offset)
+
+def collection_count(session, url, collection):
+    """Count the triples in a collection. This is cheap next to downloading
+    it, and it is how a cached export is revalidated.
+
+    Returns:
+        int
+    """
+    r = session.get(
+        url,
+        headers={'Accept': 'application/sparql-results+json'},
+        params={'query': 'select (count(*) as ?n) from <{}> where {{ ?s ?p ?o . }}'.format(
+            collection
+        )}
+    )
+    r.raise_for_status()
+    return int(r.json()['results']['bindings'][0]['n']['value'])
+
+def cached_export(session, url, collection, cache, page_size=10000, refresh=False, progress=None):
+    """Get the path to an up to date export of a collection, downloading it
+    if it isn't cached or has changed since it was cached.
+
+    Args:
+        session (requests.Session): authenticated session.
+        url (str): SPARQL endpoint.
+        collection (str): graph URI.
+        cache (CollectionCache)
+        page_size (int): number of triples to request at once.
+        refresh (bool): download the collection even if it is cached.
+        progress: a text file object to report progress to, or None.
+
+    Returns:
+        str: the path to the N-Triples export.
+    """
+    info = cache.info(collection)
+    if info is not None and not refresh:
+        if collection_count(session, url, collection) == info['count']:
+            if progress:
+                progress.write('using cached export from {}\n'.format(info['updated']))
+            return cache.path(collection)
+
+    with cache.writer(collection) as (f, info):
+        info['count'] = export_collection(
+            session, url, collection, f, page_size, progress)
+    return cache.path(collection)
+
+def iter_sparql_bindings(chunks):
+    """Parse the bindings out of a SPARQL JSON results document as it
+    arrives, without holding the whole document in memory.
+
+    Args:
+        chunks: an iterable of bytes, e.g. from Response.iter_content().
+
+    Returns:
+        a generator of dicts, one per result row.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    in_bindings = False
+
+    for chunk in chunks:
+        buf += text.decode(chunk)
+        if not in_bindings:
+            i = buf.find('"bindings"')
+            if i == -1:
+                continue
+            j = buf.find('[', i)
+            if j == -1:
+                continue
+            buf = buf[j + 1:]
+            in_bindings = True
+        while True:
+            buf = buf.lstrip(' \t\r\n,')
+            if buf.startswith(']'):
+                return
+            try:
+                row, end = decoder.raw_decode(buf)
+            except ValueError:
+                break
+            yield row
+            buf = buf[end:]
+
+def binding_term(binding):
+    """Convert one value from a SPARQL JSON result to an rdflib term. Literals
+    keep the lexical form the server sent.
+
+    Returns:
+        URIRef, Literal or BNode
+    """
+    if binding['type'] == 'uri':
+        return URIRef(binding['value'])
+    elif binding['type'] == 'bnode':
+        return BNode(binding['value'])
+    return Literal(
+        binding['value'],
+        lang=binding.get('xml:lang'),
+        datatype=binding.get('datatype'),
+        normalize=False
+    )
+
+def export_collection(session, url, collection, out, page_size=10000, progress=None):
+    """Write the triples in a collection to out as N-Triples, a page at a
+    time.
+
+    Args:
+        session (requests.Session): authenticated session.
+        url (str): SPARQL endpoint.
+        collection (str): graph URI.
+        out: a text file object.
+        page_size (int): number of triples to request at once.
+        progress: a text file object to report progress to, or None.
+
+    Returns:
+        int: the number of triples written.
+    """
+    start = time.perf_counter()
+    total = 0
+    page = 0
+    while True:
+        r = session.get(
+            url,
+            headers={'Accept': 'application/sparql-results+json'},
+            params={'query': sparql_page_query(collection, page_size, total)},
+            stream=True
+        )
+        r.raise_for_status()
+        count = 0
+        for row in iter_sparql_bindings(r.iter_content(65536)):
+            out.write('{} {} {} .\n'.format(
+                ntriples_term(binding_term(row['s'])),
+                ntriples_term(binding_term(row['p'])),
+                ntriples_term(binding_term(row['o']))
+            ))
+            count += 1
+        r.close()
+
+        total += count
+        page += 1
+        if progress:
+            elapsed = time.perf_counter() - start
+            progress.write('page {}: {} triples, {:.0f} triples/s\n'.format(
+                page, total, total / elapsed if elapsed else 0.0))
+            progress.flush()
+        if count < page_size:
+            return total
+
 def main():
     options = docopt(__doc__)
 
-    r = requests.get(
-        auth=HTTPBasicAuth(
-            os.environ['MARKLOGIC_LDR_USER'],
-            os.environ['MARKLOGIC_LDR_PASSWORD']
-        ),  
-        headers={
-            'Content-type': 'text/turtle'
-        },  
-        params={
-            'query': 'select ?s ?p ?o from <{}> where {{ ?s ?p ?o . }}'.format(
-                options['<collection>']
-            )
-        },
-        url='http://marklogic.lib.uchicago.edu:8008/v1/graphs/sparql'
+    session = requests.Session()
+    session.auth = HTTPBasicAuth(
+        os.environ['MARKLOGIC_LDR_USER'],
+        os.environ['MARKLOGIC_LDR_PASSWORD']
     )
-
-    for r in json.loads(
-        r.content.decode('utf-8')
-    )['results']['bindings']:
-        if r['o']['type'] == 'uri':
-            formatted_string = '<{}> <{}> <{}> .'
-        elif 'datatype' in r['o']:
-            if r['o']['datatype'] == 'http://www.w3.org/2001/XMLSchema#integer':
-                formatted_string = '<{}> <{}> {} .'
-            elif r['o']['datatype'] == 'http://www.w3.org/2001/XMLSchema#dateTime':
-                formatted_string = '<{}> <{}> "{}" .'
-            else:
-                raise NotImplementedError
-        elif r['o']['type'] == 'literal':
-            formatted_string = '<{}> <{}> "{}" .'
-        else:
-            raise NotImplementedError
-
-        print(formatted_string.format(
-            r['s']['value'], 
-            r['p']['value'],
-            r['o']['value']
-        ))
+    path = cached_export(
+        session,
+        options['--url'],
+        options['<collection>'],
+        CollectionCache(options['--cache']),
+        int(options['--page-size']),
+        options['--refresh'],
+        sys.stderr
+    )
+    with open(path, encoding='utf-8') as f:
+        shutil.copyfileobj(f, sys.stdout)
 
 if __name__=="__main__":
     main()
@@ -5,18 +5,22 @@
     soc_sci_maps --create <digital_record_id>
 """
 
-import io, json, hashlib, os, paramiko, sys
+import io, json, os, paramiko, sys, threading, time
 import xml.etree.ElementTree as ElementTree
 
-from classes import NoidManager, SocSciMapsMarcXmlToDc, SocSciMapsMarcXmlToEDM
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from .classes import FixityCache, get_xml_backend, NoidManager, SocSciMapsMarcXmlToDc, SocSciMapsMarcXmlToEDM, tiff_metadata
+except ImportError:
+    # run as a script, like the other converters in this directory.
+    from classes import FixityCache, get_xml_backend, NoidManager, SocSciMapsMarcXmlToDc, SocSciMapsMarcXmlToEDM, tiff_metadata
 from docopt import docopt
-from PIL import Image
 from pymarc import MARCReader
 
-Image.MAX_IMAGE_PIXELS = 1000000000
-
 ElementTree.register_namespace('m', 'http://www.loc.gov/MARC21/slim')
 
+xml_backend = get_xml_backend()
+
 # digital records for the social scientists maps. 
 # 11435664 11435665 11435666 11435667 11435668 11435669 11435670 11435671
 # 11435672 11435673 11435674 11435675 11435676 11435677 11435678 11435679
@@ -33,45 +37,85 @@ pair_tree_root = '/data/digital_collections'
 
 def get_tiff_dir(data_directory, digital_record_id):
     for subdir in os.listdir(data_directory):
-        with open('{0}/{1}/{1}.xml'.format(data_directory, subdir)) as f:
-            xml = ElementTree.parse(f)
-            for element in xml.find('m:record').findall('m:controlfield'):
-                if element.attrib['tag'] == '001':
-                    if element.text == digital_record_id:
-                        return '{}/{}/tifs'.format(data_directory, subdir)
+        xml = xml_backend.parse('{0}/{1}/{1}.xml'.format(data_directory, subdir))
+        for element in xml_backend.xpath(
+            xml,
+            'm:record/m:controlfield[@tag="001"]',
+            {'m': 'http://www.loc.gov/MARC21/slim'}
+        ):
+            if element.text == digital_record_id:
+                return '{}/{}/tifs'.format(data_directory, subdir)
     raise ValueError
 
-def get_image_data(tiff_directory):
-    image_data = []
-    for tiff in os.listdir(tiff_directory):
-            tiff_path = '{}{}{}'.format(tiff_directory, os.sep, tiff)
+def get_tiff_image_data(tiff_path, fixity_cache):
+    """Get technical metadata for one TIFF.
+
+    Returns:
+        dict
+
+    Raises:
+        ValueError, if the file isn't a TIFF.
+    """
+    image = tiff_metadata(tiff_path)
+    fixity = fixity_cache.file_fixity(tiff_path, ('md5', 'sha512'))
+
+    image.update({
+        'md5': fixity['md5'],
+        'mime_type': 'image/tiff',
+        'name': os.path.basename(tiff_path),
+        'path': tiff_path,
+        'sha512': fixity['sha512'],
+        'size': fixity['size']
+    })
+    return image
+
+def get_image_data(tiff_directory, fixity_cache=None, workers=4, max_open_files=None, progress=None):
+    """Get technical metadata for each TIFF in a directory.
+
+    TIFFs are read and hashed by a pool of threads, so that on network
+    storage one file is read while another is hashed. hashlib releases the
+    GIL, so hashing runs in parallel too.
+
+    Args:
+        tiff_directory (str)
+        fixity_cache (FixityCache): digests of TIFFs that haven't changed
+            are taken from it instead of being computed. Defaults to the
+            cache in $FIXITY_DB.
+        workers (int): number of threads.
+        max_open_files (int): optional, the most TIFFs to have open at
+            once. Defaults to workers.
+        progress: optional, a text file object to report throughput to.
+
+    Returns:
+        list: of dicts, in the order of the TIFFs' names. Files that aren't
+            TIFFs are left out and reported on stderr.
+    """
+    if fixity_cache is None:
+        fixity_cache = FixityCache()
+    open_files = threading.BoundedSemaphore(max_open_files or workers)
+
+    def image_data(tiff_path):
+        with open_files:
             try:
-                mime_type = 'image/tiff'
-                size = os.path.getsize(tiff_path)
-                img = Image.open(tiff_path)
-                width = img.size[0]
-                height = img.size[1]
-            except AttributeError:
-                sys.stdout.write('trouble with {}\n'.format(tiff_path))
-                sys.exit()
-    
-            with open(tiff_path, 'rb') as f:
-                tiff_contents = f.read()
-                md5 = hashlib.md5(tiff_contents).hexdigest()
-                sha512 = hashlib.sha512(tiff_contents).hexdigest()
-
-            image_data.append({
-                'height': height,
-                'md5': md5,
-                'mime_type': mime_type,
-                'name': '{}.tif'.format(identifier),
-                'path': tiff_path,
-                'pair_tree_path': pair_tree_path,
-                'sha512': sha512,
-                'size': size,
-                'width': width
-            })
-    return image_data
+                return get_tiff_image_data(tiff_path, fixity_cache)
+            except ValueError as e:
+                sys.stderr.write('skipping {}: {}\n'.format(tiff_path, e))
+                return None
+
+    tiff_paths = [
+        '{}{}{}'.format(tiff_directory, os.sep, tiff)
+        for tiff in sorted(os.listdir(tiff_directory))
+    ]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        data = [d for d in executor.map(image_data, tiff_paths) if d is not None]
+    elapsed = time.perf_counter() - start
+
+    if progress:
+        size = sum(d['size'] for d in data)
+        progress.write('{} TIFFs, {:.1f} MB in {:.1f}s, {:.1f} MB/s\n'.format(
+            len(data), size / 1e6, elapsed, size / 1e6 / elapsed if elapsed else 0.0))
+    return data
 
 def get_catalog_record(url):
     _, ssh_stdout, _ = ssh.exec_command('curl "{}"'.format(url))
@@ -101,17 +145,16 @@ def get_edm_str(digital_record, print_record, noid):
     edm = SocSciMapsMarcXmlToEDM(
         digital_record,
         print_record,
-        noid
-        image_data
+        noid,
         get_image_data(
             get_tiff_dir(
                 data_directory, 
-                options['<digital_record_id>']
+                digital_record['001'].value()
             )
         )
     )
     edm.build_item_triples()
-    return str(SocSciMapsMarcXmlToEDM.triples())
+    return str(edm.triples())
 
 def create(options, digital_record, print_record, noid):
     # create an SSH object.
@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+"""Usage:
+    upload_to_marklogic [--url=<url>] [--workers=<n>] [--chunk-size=<bytes>] [--retries=<n>] [--no-gzip] [--replace] <collection> <file>...
+
+Upload Turtle or N-Triples files into a MarkLogic graph. Each file is split
+into chunks that are POSTed to the /v1/graphs endpoint, a few at a time, and
+MarkLogic merges them into the graph. N-Triples files are split between
+lines. Turtle files are split between statements, at the blank lines that
+separate subjects, and each chunk repeats the @base and @prefix directives
+that came before it. Files ending in .nt are read as N-Triples, everything
+else as Turtle.
+
+Progress and throughput are reported on stderr.
+
+Options:
+  -h --help              Show this screen.
+  --url=<url>            Graph store endpoint.
+                         [default: http://marklogic.lib.uchicago.edu:8008/v1/graphs]
+  --workers=<n>          Number of chunks to upload at once. [default: 4]
+  --chunk-size=<bytes>   Approximate size of each chunk, before compression.
+                         [default: 1048576]
+  --retries=<n>          Number of times to retry a chunk that fails with a
+                         connection error or a 429 or 5xx response.
+                         [default: 5]
+  --no-gzip              Send request bodies uncompressed.
+  --replace              Delete the graph before uploading into it.
+"""
+
+import collections, gzip, os, random, requests, sys, threading, time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from docopt import docopt
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+NTRIPLES = 'application/n-triples'
+TURTLE = 'text/turtle'
+
+# status codes that are worth retrying.
+RETRY_STATUS = frozenset((408, 429, 500, 502, 503, 504))
+
+Chunk = collections.namedtuple('Chunk', ['path', 'number', 'content_type', 'data'])
+
+def content_type(path):
+    """Guess the RDF serialization of a file from its extension.
+
+    Returns:
+        str: a content type.
+    """
+    if path.endswith('.nt'):
+        return NTRIPLES
+    return TURTLE
+
+def iter_ntriples_chunks(fh, chunk_size):
+    """Split N-Triples into chunks of whole lines.
+
+    Args:
+        fh: a binary file object.
+        chunk_size (int): approximate size of each chunk in bytes.
+
+    Returns:
+        a generator of bytes.
+    """
+    lines = []
+    size = 0
+    for line in fh:
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b''.join(lines)
+            lines = []
+            size = 0
+    if lines:
+        yield b''.join(lines)
+
+def directive_key(line):
+    """Get what a line of Turtle declares, if it is a @base, @prefix, BASE or
+    PREFIX directive.
+
+    Returns:
+        bytes: b'base' or the prefix being declared, or None if the line
+            isn't a directive.
+    """
+    words = line.split(None, 2)
+    if not words:
+        return None
+    kind = words[0].lower()
+    if kind in (b'@base', b'base'):
+        return b'base'
+    if kind in (b'@prefix', b'prefix') and len(words) > 1:
+        return words[1]
+    return None
+
+def iter_turtle_chunks(fh, chunk_size):
+    """Split Turtle into chunks of whole statements.
+
+    Statements are split at blank lines, as the Turtle writers here and in
+    rdflib put between subjects. Blank lines inside long (triple quoted)
+    strings are left alone. Directives are collected as they are seen and
+    repeated at the top of every chunk, so each chunk parses on its own, even
+    when the input is several documents concatenated together.
+
+    Args:
+        fh: a binary file object.
+        chunk_size (int): approximate size of each chunk in bytes.
+
+    Returns:
+        a generator of bytes.
+    """
+    directives = collections.OrderedDict()
+    statements = []
+    statement = []
+    size = 0
+    quote = None
+
+    def end_statement():
+        nonlocal size
+        if statement:
+            statements.append(b''.join(statement))
+            size += len(statements[-1])
+            del statement[:]
+
+    def chunk():
+        return b''.join(directives.values()) + b'\n' + b'\n'.join(statements)
+
+    for line in fh:
+        if quote is None:
+            key = directive_key(line)
+            if key is not None:
+                end_statement()
+                directives[key] = line if line.endswith(b'\n') else line + b'\n'
+                continue
+            if not line.strip():
+                end_statement()
+                if size >= chunk_size:
+                    yield chunk()
+                    statements = []
+                    size = 0
+                continue
+        statement.append(line)
+        for q in (b'"""', b"'''"):
+            if quote in (None, q) and line.count(q) % 2:
+                quote = None if quote == q else q
+    end_statement()
+    if statements:
+        yield chunk()
+
+def iter_chunks(paths, chunk_size):
+    """Split files into chunks for uploading.
+
+    Returns:
+        a generator of Chunk.
+    """
+    for path in paths:
+        ctype = content_type(path)
+        split = iter_ntriples_chunks if ctype == NTRIPLES else iter_turtle_chunks
+        with open(path, 'rb') as fh:
+            for number, data in enumerate(split(fh, chunk_size), 1):
+                yield Chunk(path, number, ctype, data)
+
+class MarkLogicUploader:
+    """Upload chunks of RDF into a MarkLogic graph.
+
+    Chunks are sent over one pooled session by a fixed number of threads, and
+    only a few more chunks than there are threads are read ahead, so memory
+    use doesn't depend on the size of the input.
+
+    Args:
+        url (str): graph store endpoint, e.g. http://server:port/v1/graphs
+        collection (str): the graph to upload into.
+        workers (int): number of chunks to upload at once.
+        retries (int): number of times to retry a failed chunk.
+        backoff (float): seconds to wait before the first retry. The wait
+            doubles with each retry.
+        compress (bool): gzip request bodies.
+        auth: a requests authentication object, or None.
+        progress: a text file object to report progress to, or None.
+    """
+
+    timeout = 300
+
+    def __init__(self, url, collection, workers=4, retries=5, backoff=0.5,
+                 compress=True, auth=None, progress=None):
+        self.url = url
+        self.collection = collection
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.compress = compress
+        self.progress = progress
+
+        self.session = requests.Session()
+        self.session.auth = auth
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.lock = threading.Lock()
+        self.metrics = {
+            'chunks': 0,
+            'bytes': 0,
+            'sent_bytes': 0,
+            'retries': 0,
+            'elapsed': 0.0
+        }
+        self.start = None
+
+    def request(self, method, **kwargs):
+        """Make a request against the graph, retrying with exponential
+        backoff on connection errors and on responses that might succeed
+        later.
+
+        Returns:
+            requests.Response
+
+        Raises:
+            requests.RequestException, once the retries are used up or on a
+            response that won't succeed on a retry.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                r = self.session.request(
+                    method,
+                    self.url,
+                    params={'graph': self.collection},
+                    timeout=self.timeout,
+                    **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                if r.status_code not in RETRY_STATUS:
+                    r.raise_for_status()
+                    return r
+                error = requests.HTTPError(
+                    '{} {} for url: {}'.format(r.status_code, r.reason, r.url),
+                    response=r
+                )
+            if attempt == self.retries:
+                raise error
+            with self.lock:
+                self.metrics['retries'] += 1
+            time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def delete(self):
+        """Delete the graph."""
+        self.request('DELETE')
+
+    def post(self, chunk):
+        """Merge one chunk into the graph.
+
+        Side Effect:
+            updates metrics and reports progress.
+        """
+        data = chunk.data
+        headers = {'Content-Type': chunk.content_type}
+        if self.compress:
+            data = gzip.compress(data)
+            headers['Content-Encoding'] = 'gzip'
+        self.request('POST', data=data, headers=headers)
+
+        with self.lock:
+            self.metrics['chunks'] += 1
+            self.metrics['bytes'] += len(chunk.data)
+            self.metrics['sent_bytes'] += len(data)
+            self.metrics['elapsed'] = time.perf_counter() - self.start
+            if self.progress:
+                self.progress.write('{} chunk {}: {}\n'.format(
+                    chunk.path, chunk.number, format_metrics(self.metrics)))
+                self.progress.flush()
+
+    def upload(self, chunks):
+        """Upload chunks, a few at a time.
+
+        Args:
+            chunks: an iterable of Chunk.
+
+        Returns:
+            dict: chunks, bytes read, bytes sent, retries and elapsed
+                seconds.
+
+        Raises:
+            requests.RequestException, if a chunk can't be uploaded. Chunks
+            that haven't started yet are cancelled.
+        """
+        self.start = time.perf_counter()
+        with ThreadPoolExecutor(self.workers) as executor:
+            pending = set()
+            try:
+                for chunk in chunks:
+                    if len(pending) >= self.workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    pending.add(executor.submit(self.post, chunk))
+                for future in pending:
+                    future.result()
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+        self.metrics['elapsed'] = time.perf_counter() - self.start
+        return self.metrics
+
+    def close(self):
+        self.session.close()
+
+def format_metrics(metrics):
+    """Format upload metrics for people to read.
+
+    Returns:
+        str
+    """
+    elapsed = metrics['elapsed']
+    return '{} chunks, {:.1f} MB ({:.1f} MB sent), {:.2f} MB/s, {} retries, {:.1f}s'.format(
+        metrics['chunks'],
+        metrics['bytes'] / 1e6,
+        metrics['sent_bytes'] / 1e6,
+        metrics['bytes'] / 1e6 / elapsed if elapsed else 0.0,
+        metrics['retries'],
+        elapsed
+    )
+
+def main():
+    options = docopt(__doc__)
+
+    uploader = MarkLogicUploader(
+        options['--url'],
+        options['<collection>'],
+        workers=int(options['--workers']),
+        retries=int(options['--retries']),
+        compress=not options['--no-gzip'],
+        auth=HTTPBasicAuth(
+            os.environ['MARKLOGIC_LDR_USER'],
+            os.environ['MARKLOGIC_LDR_PASSWORD']
+        ),
+        progress=sys.stderr
+    )
+    try:
+        if options['--replace']:
+            uploader.delete()
+        metrics = uploader.upload(
+            iter_chunks(options['<file>'], int(options['--chunk-size']))
+        )
+    except requests.RequestException as e:
+        sys.stderr.write('upload failed: {}\n'.format(e))
+        sys.exit(1)
+    finally:
+        uploader.close()
+    sys.stderr.write('done: {}\n'.format(format_metrics(metrics)))
+
+if __name__ == "__main__":
+    main()
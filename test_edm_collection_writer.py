@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import io, unittest
+from metadata_converters import EDMCollectionWriter, SocSciMapsMarcXmlToEDM
+from pymarc import MARCReader
+from rdflib import Graph, URIRef
+from rdflib.namespace import DCTERMS
+
+
+class TestEDMCollectionWriter(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.mrc = {}
+        for m in ('3451312', '5999566', '7368094', '7641168'):
+            with open('./test_data/{}.mrc'.format(m), 'rb') as fh:
+                self.mrc[m] = next(MARCReader(fh))
+
+    def write_collection(self, format):
+        out = io.StringIO()
+        writer = EDMCollectionWriter(out, format)
+        edms = []
+        for d, p in (('7641168', '3451312'), ('5999566', '7368094')):
+            edm = SocSciMapsMarcXmlToEDM(self.mrc[d], self.mrc[p], d, [], writer.new_graph())
+            edm.build_item_triples()
+            writer.add_item(edm)
+            edms.append(edm)
+
+        graph = writer.new_graph()
+        SocSciMapsMarcXmlToEDM.build_socscimap_collection_triples(graph, writer.items)
+        writer.write(graph)
+        return out.getvalue(), writer, edms
+
+    def test_items_have_their_own_graphs(self):
+        """items shouldn't share a graph."""
+
+        a = SocSciMapsMarcXmlToEDM(self.mrc['7641168'], self.mrc['3451312'], '7641168', [])
+        b = SocSciMapsMarcXmlToEDM(self.mrc['5999566'], self.mrc['7368094'], '5999566', [])
+        self.assertIsNot(a.graph, b.graph)
+
+    def test_graphs_are_released(self):
+        """the writer releases each item's graph once it is written, and
+        keeps only the item's CHO."""
+
+        _, writer, edms = self.write_collection('turtle')
+        self.assertTrue(all(edm.graph is None for edm in edms))
+        self.assertEqual(
+            writer.items,
+            [URIRef('ark:/61001/7641168'), URIRef('ark:/61001/5999566')]
+        )
+
+    def test_turtle_output(self):
+        """concatenated Turtle documents should parse as one graph, with the
+        collection connected to each item."""
+
+        for format in ('turtle', 'nt'):
+            data, _, _ = self.write_collection(format)
+            graph = Graph().parse(data=data, format=format)
+            self.assertEqual(
+                set(graph.objects(SocSciMapsMarcXmlToEDM.CHISOC_CHO, DCTERMS.hasPart)),
+                set([URIRef('ark:/61001/7641168'), URIRef('ark:/61001/5999566')])
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
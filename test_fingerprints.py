@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import os, tempfile, unittest
+from metadata_converters import FingerprintManifest
+from metadata_converters.classes import file_fingerprint, fingerprint, marc_fingerprint
+from pymarc import MARCReader
+
+
+class TestFingerprints(unittest.TestCase):
+    def test_marc_fingerprint(self):
+        """a MARC record's fingerprint is its 005 field."""
+
+        with open('./test_data/7641168.mrc', 'rb') as fh:
+            record = next(MARCReader(fh))
+        self.assertEqual(marc_fingerprint(record), record['005'].data)
+
+    def test_file_fingerprint(self):
+        """a file's fingerprint changes when the file does, and is None for a
+        missing file."""
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'file.tif')
+            self.assertIsNone(file_fingerprint(path))
+
+            with open(path, 'wb') as f:
+                f.write(b'a')
+            before = fingerprint(file_fingerprint(path))
+            os.utime(path, ns=(0, 0))
+            self.assertNotEqual(fingerprint(file_fingerprint(path)), before)
+
+
+class TestFingerprintManifest(unittest.TestCase):
+    def test_changed(self):
+        """an ARK needs rebuilding until its current fingerprint is recorded,
+        and again once its fingerprint changes."""
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'fingerprints.db')
+            manifest = FingerprintManifest(path)
+            self.assertTrue(manifest.changed('ark:/61001/b2dq0kf6d36z', 'a'))
+            manifest.update('ark:/61001/b2dq0kf6d36z', 'a')
+            manifest.close()
+
+            manifest = FingerprintManifest(path)
+            self.assertFalse(manifest.changed('ark:/61001/b2dq0kf6d36z', 'a'))
+            self.assertTrue(manifest.changed('ark:/61001/b2dq0kf6d36z', 'b'))
+            manifest.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
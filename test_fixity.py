@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+import hashlib, http.server, io, os, requests, tempfile, threading, unittest
+from metadata_converters import Fixity, FixityCache
+from metadata_converters.classes import FIXITY_ALGORITHMS, file_fixity, \
+    files_fixity, read_tiff_metadata
+from PIL import Image
+from test_tiff import libtiff_layout
+
+
+def pil_tiff(size):
+    f = io.BytesIO()
+    Image.new('RGB', size).save(f, format='TIFF')
+    return f.getvalue()
+
+
+class StubTiffServer(http.server.ThreadingHTTPServer):
+    """A local stand in for the ARK server, serving one TIFF with an ETag
+    and answering conditional requests, and range requests if ranges is
+    set."""
+
+    def __init__(self, data, etag, ranges=False):
+        super().__init__(('127.0.0.1', 0), StubTiffServerHandler)
+        self.data = data
+        self.etag = etag
+        self.ranges = ranges
+        self.requests = []
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/ark:61001/b2dq0kf6d36z/file.tif'.format(self.server_address[1])
+
+
+class StubTiffServerHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == self.server.etag:
+            self.server.requests.append(304)
+            self.send_response(304)
+            self.send_header('ETag', self.server.etag)
+            self.end_headers()
+            return
+        if self.server.ranges and self.headers.get('Range'):
+            start, end = map(int, self.headers['Range'][len('bytes='):].split('-'))
+            data = self.server.data[start:end + 1]
+            self.server.requests.append(206)
+            self.send_response(206)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        self.server.requests.append(200)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/tiff')
+        self.send_header('Content-Length', str(len(self.server.data)))
+        self.send_header('ETag', self.server.etag)
+        self.send_header('Last-Modified', 'Wed, 21 Oct 2015 07:28:00 GMT')
+        self.end_headers()
+        self.wfile.write(self.server.data)
+
+
+class TestFixity(unittest.TestCase):
+    def expected(self, data, algorithms=FIXITY_ALGORITHMS):
+        result = {'size': len(data)}
+        for algorithm in algorithms:
+            result[algorithm] = hashlib.new(algorithm, data).hexdigest()
+        return result
+
+    def test_blocks(self):
+        """data fed in blocks should give the same digests as hashing it all
+        at once."""
+
+        data = os.urandom(2500)
+        fixity = Fixity(FIXITY_ALGORITHMS)
+        fixity.block_size = 1000
+        fixity.update(data[:1200])
+        fixity.update(data[1200:])
+        self.assertEqual(fixity.hexdigests(), self.expected(data))
+
+    def test_files(self):
+        """files should be hashed in chunks, and in parallel, with results
+        in the order of the paths."""
+
+        with tempfile.TemporaryDirectory() as d:
+            data = [os.urandom(n) for n in (0, 1, 5000, 70000)]
+            paths = []
+            for i, contents in enumerate(data):
+                paths.append(os.path.join(d, '{}.tif'.format(i)))
+                with open(paths[-1], 'wb') as f:
+                    f.write(contents)
+
+            self.assertEqual(
+                file_fixity(paths[3], FIXITY_ALGORITHMS, chunk_size=4096),
+                self.expected(data[3])
+            )
+            self.assertEqual(
+                files_fixity(paths, ('md5', 'sha512'), workers=3),
+                [self.expected(contents, ('md5', 'sha512')) for contents in data]
+            )
+
+
+class TestFixityCache(unittest.TestCase):
+    def test_cache(self):
+        """digests should be reused while a file's size, mtime and inode are
+        unchanged, and recomputed when it changes or on verify."""
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'file.tif')
+            with open(path, 'wb') as f:
+                f.write(b'a' * 100)
+            cache = FixityCache(os.path.join(d, 'fixity.db'))
+            first = cache.file_fixity(path)
+            self.assertEqual(first['md5'], hashlib.md5(b'a' * 100).hexdigest())
+            cache.close()
+
+            # change the contents in place, but keep the size and mtime.
+            stat = os.stat(path)
+            with open(path, 'r+b') as f:
+                f.write(b'b')
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+            cache = FixityCache(os.path.join(d, 'fixity.db'))
+            self.assertEqual(cache.file_fixity(path), first)
+
+            # an algorithm that isn't cached yet means hashing the file, and
+            # the change is noticed.
+            self.assertEqual(
+                cache.file_fixity(path, ('md5', 'sha1'))['md5'],
+                hashlib.md5(b'b' + b'a' * 99).hexdigest()
+            )
+            self.assertEqual(cache.mismatches, [(path, 'md5')])
+
+            cache.verify = True
+            cache.file_fixity(path, ('md5', 'sha512'))
+            self.assertEqual(cache.mismatches, [(path, 'md5'), (path, 'sha512')])
+
+            # a new mtime means hashing the file.
+            os.utime(path, ns=(0, 0))
+            cache.verify = False
+            self.assertEqual(
+                cache.file_fixity(path, ('sha512',))['sha512'],
+                hashlib.sha512(b'b' + b'a' * 99).hexdigest()
+            )
+            cache.close()
+
+    def test_url(self):
+        """a remote TIFF should be streamed and hashed, then only fetched
+        again when its ETag changes, or on verify."""
+
+        data = pil_tiff((300, 200))
+        server = StubTiffServer(data, '"1"')
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            with tempfile.TemporaryDirectory() as d:
+                cache = FixityCache(os.path.join(d, 'fixity.db'))
+                session = requests.Session()
+                first = cache.tiff_url_fixity(session, server.url, chunk_size=1000)
+                self.assertEqual(first['sha512'], hashlib.sha512(data).hexdigest())
+                self.assertEqual(first['size'], len(data))
+                self.assertEqual((first['width'], first['height']), (300, 200))
+
+                self.assertEqual(cache.tiff_url_fixity(session, server.url), first)
+                self.assertEqual(server.requests, [200, 304])
+
+                # a new ETag means downloading the TIFF.
+                server.data, server.etag = pil_tiff((30, 20)), '"2"'
+                second = cache.tiff_url_fixity(session, server.url)
+                self.assertEqual((second['width'], second['height']), (30, 20))
+                self.assertEqual(cache.mismatches, [])
+
+                # verify downloads it anyway, and notices the change.
+                server.data = data
+                cache.verify = True
+                cache.tiff_url_fixity(session, server.url)
+                self.assertEqual(server.requests, [200, 304, 200, 200])
+                self.assertEqual(
+                    cache.mismatches, [(server.url, 'md5'), (server.url, 'sha512')])
+                cache.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def test_url_missing_values(self):
+        """values that went past before the IFD pointed to them should be
+        fetched with range requests, and metadata that is still incomplete
+        should not be cached."""
+
+        data = libtiff_layout(values_first=True)
+        expected = tiff_metadata_of(data)
+        for ranges in (False, True):
+            server = StubTiffServer(data, '"1"', ranges)
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                with tempfile.TemporaryDirectory() as d:
+                    cache = FixityCache(os.path.join(d, 'fixity.db'))
+                    session = requests.Session()
+                    result = cache.tiff_url_fixity(session, server.url, chunk_size=4096)
+                    cache.tiff_url_fixity(session, server.url, chunk_size=4096)
+                    cache.close()
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+
+            if ranges:
+                self.assertEqual(result['x_resolution'], expected['x_resolution'])
+                self.assertEqual(result['bits_per_sample'], expected['bits_per_sample'])
+                # three values fetched by range, then cached.
+                self.assertEqual(server.requests, [200, 206, 206, 206, 304])
+            else:
+                self.assertIsNone(result['x_resolution'])
+                self.assertIsNone(result['bits_per_sample'])
+                # the ranges are ignored, and nothing is cached, so the
+                # second request isn't conditional.
+                self.assertEqual(server.requests, [200] * 8)
+
+
+def tiff_metadata_of(data):
+    return read_tiff_metadata(io.BytesIO(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import os, tempfile, unittest
+from metadata_converters import SocSciMapsMarcXmlToDc
+from metadata_converters.marc2dc import marc_to_dc_soc_sci_batch, \
+    read_marc_record, read_manifest
+
+
+class TestMarcToDcBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        not_marc = os.path.join(self.tmp.name, 'not_marc.mrc')
+        with open(not_marc, 'wb') as f:
+            f.write(b'not a MARC record')
+        self.manifest = os.path.join(self.tmp.name, 'manifest.tsv')
+        with open(self.manifest, 'w') as f:
+            f.write('./test_data/7641168.mrc\t./test_data/3451312.mrc\tb2dq0kf6d36z\textra\n')
+            f.write('\n')
+            f.write('./test_data/missing.mrc\t./test_data/3451312.mrc\tb0000000000a\n')
+            f.write('{}\t./test_data/3451312.mrc\tb0000000000b\n'.format(not_marc))
+            f.write('b0000000000c\n')
+            f.write('./test_data/5999566.mrc\t./test_data/7368094.mrc\tb2vq2sh1x44g\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_read_manifest(self):
+        """blank lines and extra columns should be ignored."""
+
+        self.assertEqual(
+            [row[-1] for row in read_manifest(self.manifest)],
+            ['b2dq0kf6d36z', 'b0000000000a', 'b0000000000b', 'b0000000000c', 'b2vq2sh1x44g']
+        )
+
+    def test_batch(self):
+        """pairs should be converted in manifest order, and pairs that can't
+        be converted should be reported without ending the batch."""
+
+        pairs = read_manifest(self.manifest)
+        results = list(marc_to_dc_soc_sci_batch(pairs, workers=2))
+
+        self.assertEqual([r[0] for r in results], [p[-1] for p in pairs])
+        for pair, (noid, dc_str, _, _, error) in zip(pairs, results):
+            if noid.startswith('b000'):
+                self.assertIsNone(dc_str)
+                self.assertTrue(error)
+            else:
+                self.assertIsNone(error)
+                self.assertEqual(dc_str, str(SocSciMapsMarcXmlToDc(
+                    read_marc_record(pair[0]), read_marc_record(pair[1]), noid)))
+        self.assertIn('FileNotFoundError', results[1][4])
+        self.assertEqual(results[3][4], 'ValueError: expected 3 columns, got 1')
+
+
+if __name__ == '__main__':
+    unittest.main()
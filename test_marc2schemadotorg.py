@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import io, json, os, unittest
+import xml.etree.ElementTree as ElementTree
+from metadata_converters import MarcXmlToSchemaDotOrg
+from metadata_converters.marc2schemadotorg import batch, iter_path_records
+from pymarc import MARCReader
+
+MARCXML = '{http://www.loc.gov/MARC21/slim}'
+
+
+def single_records(path):
+    """Convert each record in a file on its own: a pymarc record for binary
+    MARC, a one-record MARCXML collection for MARCXML."""
+
+    if path.endswith('.mrc'):
+        with open(path, 'rb') as fh:
+            return [MarcXmlToSchemaDotOrg(r)() for r in MARCReader(fh)]
+    converted = []
+    for record in ElementTree.parse(path).getroot().iter(MARCXML + 'record'):
+        collection = ElementTree.Element(MARCXML + 'collection')
+        collection.append(record)
+        converted.append(MarcXmlToSchemaDotOrg(
+            ElementTree.tostring(collection, encoding='unicode'))())
+    return converted
+
+
+class TestBatch(unittest.TestCase):
+    def test_batch(self):
+        """a batch should write one JSON object per line for every record in
+        a directory of .mrc and .xml files, the same as converting each
+        record on its own."""
+
+        expected = []
+        extensions = set()
+        for filename in sorted(os.listdir('test_data')):
+            if filename.endswith(('.mrc', '.xml')):
+                expected.extend(single_records(os.path.join('test_data', filename)))
+                extensions.add(os.path.splitext(filename)[1])
+        self.assertEqual(extensions, {'.mrc', '.xml'})
+
+        out = io.StringIO()
+        n, _ = batch(iter_path_records('test_data'), out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(n, len(expected))
+        self.assertEqual(len(lines), n)
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_iter_path_records(self):
+        """a file should give the same records as the directory it's in."""
+
+        records = [r for f in sorted(os.listdir('test_data'))
+                   if f.endswith(('.mrc', '.xml'))
+                   for r in iter_path_records(os.path.join('test_data', f))]
+        self.assertEqual(len(records), len(list(iter_path_records('test_data'))))
+
+
+if __name__ == '__main__':
+    unittest.main()
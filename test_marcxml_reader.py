@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import importlib.util, unittest
+from metadata_converters import iter_marcxml_records, MarcXmlToSchemaDotOrg
+from metadata_converters.classes import set_xml_backend
+from pymarc import MARCReader, record_to_xml
+import xml.etree.ElementTree as ElementTree
+
+has_lxml = importlib.util.find_spec('lxml') is not None
+
+
+class XmlBackendTestCase(unittest.TestCase):
+    """Run a test case's tests with one XML backend, then go back to the
+    default backend."""
+
+    backend = 'etree'
+
+    def setUp(self):
+        set_xml_backend(self.backend)
+        self.addCleanup(set_xml_backend)
+
+
+class TestIterMarcXmlRecords(XmlBackendTestCase):
+    def test_record_count(self):
+        """iter_marcxml_records() should yield every record in a
+           collection."""
+
+        self.assertEqual(
+            len(list(iter_marcxml_records('test_data/VuFindExport.xml'))),
+            46
+        )
+
+    def test_single_record(self):
+        """a collection with a single record should yield that record."""
+
+        records = list(iter_marcxml_records('test_data/sample_record_03.xml'))
+        self.assertEqual(len(records), 1)
+        self.assertTrue(ElementTree.iselement(records[0]))
+
+    def test_iterparse_matches_fromstring(self):
+        """converting a streamed record should give the same result as
+           converting the same record from a string."""
+
+        with open('test_data/sample_record_03.xml', 'r', encoding='utf-8') as f:
+            marcxml = f.read()
+
+        self.assertEqual(
+            next(MarcXmlToSchemaDotOrg.iterparse('test_data/sample_record_03.xml'))(),
+            MarcXmlToSchemaDotOrg(marcxml)()
+        )
+
+
+@unittest.skipUnless(has_lxml, 'lxml is not installed')
+class TestIterMarcXmlRecordsLxml(TestIterMarcXmlRecords):
+    backend = 'lxml'
+
+
+class TestPymarcRecords(XmlBackendTestCase):
+    def test_pymarc_record_matches_marcxml(self):
+        """converting a pymarc record or raw binary MARC directly should give
+           the same result as converting it from MARCXML."""
+
+        with open('test_data/7641168.mrc', 'rb') as fh:
+            data = fh.read()
+            fh.seek(0)
+            record = next(MARCReader(fh))
+
+        marcxml = MarcXmlToSchemaDotOrg(
+            ElementTree.fromstring(record_to_xml(record, namespace=True))
+        )()
+        self.assertEqual(MarcXmlToSchemaDotOrg(record)(), marcxml)
+        self.assertEqual(MarcXmlToSchemaDotOrg(data)(), marcxml)
+
+
+@unittest.skipUnless(has_lxml, 'lxml is not installed')
+class TestPymarcRecordsLxml(TestPymarcRecords):
+    backend = 'lxml'
+
+
+if __name__ == '__main__':
+    unittest.main()
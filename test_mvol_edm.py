@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import importlib.util, io, multiprocessing, os, sys, tempfile, unittest
+from importlib.machinery import SourceFileLoader
+from unittest import mock
+
+# mvol_edm is a script, importing from the modules next to it. It needs
+# digital_collection_validators, which isn't on PyPI.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'metadata_converters'))
+if importlib.util.find_spec('digital_collection_validators'):
+    mvol_edm = SourceFileLoader(
+        'mvol_edm',
+        os.path.join(os.path.dirname(__file__), 'metadata_converters', 'mvol_edm')
+    ).load_module()
+else:
+    mvol_edm = None
+
+
+@unittest.skipIf(mvol_edm is None, 'digital_collection_validators is not installed')
+class TestRegenerate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.join(self.tmp.name, 'IIIF_Files')
+        self.identifiers = ['mvol-0001-0002-0003', 'mvol-0001-0002-0004']
+        for identifier in self.identifiers:
+            directory = os.path.join(self.root, *identifier.split('-'))
+            os.makedirs(os.path.join(directory, 'TIFF'))
+            with open(os.path.join(directory, '{}.dc.xml'.format(identifier)), 'w') as f:
+                f.write('<metadata/>')
+            for n in (1, 2):
+                with open(os.path.join(directory, 'TIFF', '{}_{:04d}.tif'.format(identifier, n)), 'wb') as f:
+                    f.write(b'II*\x00')
+
+        self.built = []
+        def all_objects_triples(noid, identifier, object_count, *args):
+            self.built.append((noid, identifier, object_count))
+            return [(None, 'item'), (1, 'one'), (2, 'two')]
+
+        patches = (
+            mock.patch.object(mvol_edm, 'IIIF_ROOT', self.root),
+            mock.patch.object(mvol_edm, 'get_ark', lambda i: 'ark:/61001/' + i.replace('-', '')),
+            mock.patch.object(mvol_edm, 'get_metadata', lambda i: ('1900', 'description', 'title')),
+            mock.patch.object(mvol_edm, 'all_objects_triples', all_objects_triples)
+        )
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_item_fingerprint(self):
+        """an item's fingerprint changes when one of its files does."""
+
+        identifier = self.identifiers[0]
+        before = mvol_edm.item_fingerprint(identifier, 'ark:/61001/b2dq0kf6d36z')
+        self.assertEqual(mvol_edm.item_fingerprint(identifier, 'ark:/61001/b2dq0kf6d36z'), before)
+        os.utime(os.path.join(self.root, 'mvol', '0001', '0002', '0003', 'TIFF',
+                              '{}_0002.tif'.format(identifier)), ns=(0, 0))
+        self.assertNotEqual(mvol_edm.item_fingerprint(identifier, 'ark:/61001/b2dq0kf6d36z'), before)
+
+    def test_regenerate(self):
+        """only items whose files changed since they were last built should
+        be rebuilt, unless every item is forced."""
+
+        manifest = os.path.join(self.tmp.name, 'manifest.db')
+        output = os.path.join(self.tmp.name, 'edm')
+
+        self.assertEqual(mvol_edm.regenerate(manifest, self.identifiers, output=output), (2, 2))
+        self.assertEqual(self.built, [
+            ('mvol000100020003', 'mvol-0001-0002-0003', 2),
+            ('mvol000100020004', 'mvol-0001-0002-0004', 2)
+        ])
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(output, 'mvol-0001-0002-0004'))),
+            ['00000001.ttl', '00000002.ttl', 'item.ttl']
+        )
+
+        self.assertEqual(mvol_edm.regenerate(manifest, self.identifiers, output=output), (0, 2))
+
+        os.utime(os.path.join(self.root, 'mvol', '0001', '0002', '0004', 'TIFF',
+                              'mvol-0001-0002-0004_0001.tif'), ns=(0, 0))
+        del self.built[:]
+        self.assertEqual(mvol_edm.regenerate(manifest, self.identifiers, output=output), (1, 2))
+        self.assertEqual(self.built, [('mvol000100020004', 'mvol-0001-0002-0004', 2)])
+
+        self.assertEqual(mvol_edm.regenerate(manifest, self.identifiers, force=True, output=output), (2, 2))
+
+
+@unittest.skipIf(mvol_edm is None, 'digital_collection_validators is not installed')
+@unittest.skipUnless(multiprocessing.get_start_method() == 'fork',
+                     'workers only see the patched object_triples when forked')
+class TestAllObjects(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        directory = os.path.join(self.tmp.name, 'mvol', '0001', '0002', '0003')
+        os.makedirs(directory)
+        with open(os.path.join(directory, 'mvol-0001-0002-0003.struct.txt'), 'w') as f:
+            f.write('object\tpage\n00000001\t1\n')
+
+        def object_triples(noid, identifier, object_count, title, description,
+                           date, object_number=None, ntriples=False):
+            return '{} {} {}\n'.format(noid, object_number, os.getpid())
+
+        patches = (
+            mock.patch.object(mvol_edm, 'IIIF_ROOT', self.tmp.name),
+            mock.patch.object(mvol_edm, 'object_triples', object_triples)
+        )
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(mvol_edm.get_page_labels.cache_clear)
+        self.addCleanup(mvol_edm.file_exists.cache_clear)
+
+    def objects(self):
+        return mvol_edm.all_objects_triples(
+            'b2dq0kf6d36z', 'mvol-0001-0002-0003', 25, 'title', 'description',
+            '1900', workers=2)
+
+    def test_all_objects_triples(self):
+        """the item and its objects should be built by the workers, and come
+        back in order, starting with the item."""
+
+        objects = list(self.objects())
+        self.assertEqual([n for n, _ in objects], [None] + list(range(1, 26)))
+        for n, triples in objects:
+            noid, object_number, pid = triples.split()
+            self.assertEqual(object_number, str(n))
+            self.assertNotEqual(int(pid), os.getpid())
+
+    def test_write_all_objects(self):
+        """each object should be written to a file of its own."""
+
+        output = os.path.join(self.tmp.name, 'edm')
+        mvol_edm.write_all_objects(self.objects(), output, ntriples=True)
+        self.assertEqual(
+            sorted(os.listdir(output)),
+            ['{:08d}.nt'.format(n) for n in range(1, 26)] + ['item.nt']
+        )
+        with open(os.path.join(output, '00000007.nt')) as f:
+            self.assertTrue(f.read().startswith('b2dq0kf6d36z 7 '))
+
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            mvol_edm.write_all_objects(self.objects())
+        self.assertEqual(
+            [line.split()[1] for line in stdout.getvalue().splitlines()],
+            ['None'] + [str(n) for n in range(1, 26)]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
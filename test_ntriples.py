@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import io, unittest
+from metadata_converters import NTriplesSink, SocSciMapsMarcXmlToEDM
+from metadata_converters.classes import iter_ntriples, ntriples_term, \
+    ntriples_value
+from pymarc import MARCReader
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+from rdflib.namespace import XSD
+
+
+class TestNTriplesTerm(unittest.TestCase):
+    def test_uri(self):
+        """URIs are written in angle brackets."""
+
+        self.assertEqual(
+            ntriples_term(URIRef('http://example.org/a')),
+            '<http://example.org/a>'
+        )
+
+    def test_uri_escapes(self):
+        """characters that aren't allowed in an IRI are written as \\u
+           escapes."""
+
+        self.assertEqual(
+            ntriples_term(URIRef('http://example.org/a b>')),
+            '<http://example.org/a\\u0020b\\u003E>'
+        )
+
+    def test_literal_escapes(self):
+        """quotes, backslashes and line breaks in literals are escaped."""
+
+        self.assertEqual(
+            ntriples_term(Literal('a "b"\\c\nd\re')),
+            '"a \\"b\\"\\\\c\\nd\\re"'
+        )
+
+    def test_literal_language_and_datatype(self):
+        """literals keep their language tag or datatype."""
+
+        self.assertEqual(ntriples_term(Literal('Chicago', lang='en')), '"Chicago"@en')
+        self.assertEqual(
+            ntriples_term(Literal(0)),
+            '"0"^^<{}>'.format(XSD.integer)
+        )
+
+    def test_bnode(self):
+        """blank nodes are written with a _: prefix."""
+
+        self.assertEqual(ntriples_term(BNode('b0')), '_:b0')
+
+
+class TestNTriplesSink(unittest.TestCase):
+    def test_nquads(self):
+        """with a graph name, the sink writes N-Quads."""
+
+        out = io.StringIO()
+        sink = NTriplesSink(out, 'http://example.org/g')
+        sink.add((URIRef('http://example.org/s'), URIRef('http://example.org/p'), Literal('o')))
+        self.assertEqual(
+            out.getvalue(),
+            '<http://example.org/s> <http://example.org/p> "o" <http://example.org/g> .\n'
+        )
+        self.assertEqual(len(sink), 1)
+
+    def test_edm_matches_graph(self):
+        """streaming an item's EDM should give the same triples as building it
+           in a graph."""
+
+        mrc = {}
+        for m in ('7641168', '3451312'):
+            with open('./test_data/{}.mrc'.format(m), 'rb') as fh:
+                mrc[m] = next(MARCReader(fh))
+
+        edm = SocSciMapsMarcXmlToEDM(mrc['7641168'], mrc['3451312'], 'b2dq0kf6d36z', [], Graph())
+        edm.build_item_triples()
+        graph = edm.graph
+
+        out = io.StringIO()
+        edm.graph = NTriplesSink(out)
+        edm.build_item_triples()
+
+        self.assertTrue(
+            isomorphic(Graph().parse(data=out.getvalue(), format='nt'), graph)
+        )
+
+
+class TestIterNTriples(unittest.TestCase):
+    def test_split(self):
+        """lines are split into their three terms, and blank lines and
+           comments are skipped."""
+
+        lines = [
+            '<ark:/61001/a> <http://purl.org/dc/elements/1.1/title> "a . b"@en .\n',
+            '\n',
+            '# a comment\n',
+            '_:b1\t<http://purl.org/dc/elements/1.1/relation>  <ark:/61001/a>.\n'
+        ]
+        self.assertEqual(list(iter_ntriples(lines)), [
+            ('<ark:/61001/a>', '<http://purl.org/dc/elements/1.1/title>', '"a . b"@en'),
+            ('_:b1', '<http://purl.org/dc/elements/1.1/relation>', '<ark:/61001/a>')
+        ])
+
+    def test_values(self):
+        """values are unescaped, and lose their language or datatype."""
+
+        for term in (
+            URIRef('http://example.org/a b'),
+            Literal('a "b"\nc \\ ü', lang='en'),
+            Literal('1910', datatype=XSD.integer),
+            Literal('\\u0041')
+        ):
+            self.assertEqual(ntriples_value(ntriples_term(term)), str(term))
+        self.assertEqual(ntriples_value('"\\u00FC\\U0001F600"'), '\u00fc\U0001F600')
+
+
+if __name__ == '__main__':
+    unittest.main()
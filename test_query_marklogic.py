@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import http.server, io, json, re, requests, tempfile, threading, unittest, urllib.parse
+from metadata_converters import CollectionCache
+from metadata_converters.query_marklogic import cached_export, \
+    export_collection, iter_sparql_bindings
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import DC, XSD
+
+ITEM = URIRef('ark:/61001/b2dq0kf6d36z')
+
+
+def sparql_json(graph):
+    """The triples in a graph as SPARQL JSON result rows."""
+    def binding(term):
+        if isinstance(term, URIRef):
+            return {'type': 'uri', 'value': str(term)}
+        b = {'type': 'literal', 'value': str(term)}
+        if term.language:
+            b['xml:lang'] = term.language
+        elif term.datatype:
+            b['datatype'] = str(term.datatype)
+        return b
+    return [
+        {'s': binding(s), 'p': binding(p), 'o': binding(o)}
+        for s, p, o in sorted(graph)
+    ]
+
+
+class StubSparqlEndpoint(http.server.ThreadingHTTPServer):
+    """A local stand in for MarkLogic's SPARQL endpoint, answering LIMIT and
+    OFFSET queries from a list of result rows."""
+
+    def __init__(self, rows):
+        super().__init__(('127.0.0.1', 0), StubSparqlEndpointHandler)
+        self.rows = rows
+        self.queries = []
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/v1/graphs/sparql'.format(self.server_address[1])
+
+
+class StubSparqlEndpointHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)['query'][0]
+        self.server.queries.append(query)
+        if 'count(*)' in query:
+            data = json.dumps({
+                'head': {'vars': ['n']},
+                'results': {'bindings': [{'n': {
+                    'type': 'literal',
+                    'datatype': 'http://www.w3.org/2001/XMLSchema#integer',
+                    'value': str(len(self.server.rows))
+                }}]}
+            }).encode('utf-8')
+        else:
+            limit, offset = map(int, re.search('limit ([0-9]+) offset ([0-9]+)', query).groups())
+            data = json.dumps({
+                'head': {'vars': ['s', 'p', 'o']},
+                'results': {'bindings': self.server.rows[offset:offset + limit]}
+            }, indent=1).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/sparql-results+json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TestQueryMarkLogic(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.graph = Graph()
+        self.graph.add((ITEM, DC.title, Literal('a "quoted"\ntitle with a \\ and ü')))
+        self.graph.add((ITEM, DC.title, Literal('Chicago', lang='en')))
+        self.graph.add((ITEM, DC.date, Literal('1910', datatype=XSD.integer)))
+        for i in range(20):
+            self.graph.add((URIRef('ark:/61001/b{:02d}'.format(i)), DC.relation, ITEM))
+
+    def test_incremental_parsing(self):
+        """bindings should be parsed however the document is split up."""
+
+        rows = sparql_json(self.graph)
+        data = json.dumps({'head': {}, 'results': {'bindings': rows}}).encode('utf-8')
+        chunks = (data[i:i + 1] for i in range(len(data)))
+        self.assertEqual(list(iter_sparql_bindings(chunks)), rows)
+
+    def serve(self, server, f):
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            return f()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def test_export(self):
+        """a paginated export should write every triple once, as N-Triples
+        that parse back to the same graph."""
+
+        server = StubSparqlEndpoint(sparql_json(self.graph))
+        out = io.StringIO()
+        total = self.serve(server, lambda: export_collection(
+            requests.Session(), server.url, 'socscimaps', out, page_size=8))
+
+        self.assertEqual(total, len(self.graph))
+        self.assertEqual(len(server.queries), 3)
+        self.assertIn('order by', server.queries[0])
+        self.assertIn('"1910"^^<http://www.w3.org/2001/XMLSchema#integer>', out.getvalue())
+        self.assertEqual(set(Graph().parse(data=out.getvalue(), format='nt')), set(self.graph))
+
+    def test_cache(self):
+        """a cached export should be reused until the collection's count
+        changes, or a refresh is asked for."""
+
+        server = StubSparqlEndpoint(sparql_json(self.graph))
+
+        def export(refresh=False):
+            del server.queries[:]
+            return cached_export(
+                requests.Session(), server.url, 'socscimaps', cache, 8, refresh)
+
+        with tempfile.TemporaryDirectory() as d:
+            cache = CollectionCache(d)
+            self.assertIsNone(cache.path('socscimaps'))
+
+            def run():
+                path = export()
+                self.assertEqual(len(server.queries), 3)
+                self.assertEqual(cache.info('socscimaps')['count'], len(self.graph))
+
+                self.assertEqual(export(), path)
+                self.assertEqual(len(server.queries), 1)
+
+                export(refresh=True)
+                self.assertEqual(len(server.queries), 3)
+
+                server.rows = server.rows[1:]
+                export()
+                self.assertEqual(len(server.queries), 4)
+                return path
+
+            path = self.serve(server, run)
+            self.assertEqual(len(Graph().parse(path, format='nt')), len(self.graph) - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
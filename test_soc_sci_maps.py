@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import hashlib, io, os, tempfile, threading, time, unittest
+from unittest import mock
+from metadata_converters import FixityCache
+from metadata_converters import soc_sci_maps
+from PIL import Image
+
+
+class TestGetImageData(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tiff_directory = os.path.join(self.tmp.name, 'tifs')
+        os.mkdir(self.tiff_directory)
+        # write the TIFFs out of order, and a file that isn't a TIFF.
+        self.sizes = {}
+        for i in (3, 0, 4, 1, 2):
+            name = '{:04d}.tif'.format(i)
+            Image.new('RGB', (10 + i, 20 + i)).save(
+                os.path.join(self.tiff_directory, name), format='TIFF')
+            self.sizes[name] = (10 + i, 20 + i)
+        with open(os.path.join(self.tiff_directory, '0002a.tif'), 'wb') as f:
+            f.write(b'not a tiff')
+        self.fixity_cache = FixityCache(os.path.join(self.tmp.name, 'fixity.db'))
+
+    def tearDown(self):
+        self.fixity_cache.close()
+        self.tmp.cleanup()
+
+    def test_image_data(self):
+        """TIFFs should be described in the order of their names, with files
+        that aren't TIFFs skipped, and throughput reported."""
+
+        progress = io.StringIO()
+        data = soc_sci_maps.get_image_data(
+            self.tiff_directory, self.fixity_cache, workers=3, progress=progress)
+
+        self.assertEqual([d['name'] for d in data], sorted(self.sizes))
+        for d in data:
+            self.assertEqual((d['width'], d['height']), self.sizes[d['name']])
+            with open(d['path'], 'rb') as f:
+                contents = f.read()
+            self.assertEqual(d['sha512'], hashlib.sha512(contents).hexdigest())
+            self.assertEqual(d['size'], len(contents))
+        self.assertRegex(progress.getvalue(), '^5 TIFFs, .* MB/s\n$')
+
+    def test_max_open_files(self):
+        """no more than max_open_files TIFFs should be read at once."""
+
+        lock = threading.Lock()
+        state = {'open': 0, 'most': 0}
+        get_tiff_image_data = soc_sci_maps.get_tiff_image_data
+
+        def counting(tiff_path, fixity_cache):
+            with lock:
+                state['open'] += 1
+                state['most'] = max(state['most'], state['open'])
+            time.sleep(0.05)
+            try:
+                return get_tiff_image_data(tiff_path, fixity_cache)
+            finally:
+                with lock:
+                    state['open'] -= 1
+
+        with mock.patch.object(soc_sci_maps, 'get_tiff_image_data', counting):
+            data = soc_sci_maps.get_image_data(
+                self.tiff_directory, self.fixity_cache, workers=4, max_open_files=2)
+
+        self.assertEqual(len(data), 5)
+        self.assertEqual(state['most'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
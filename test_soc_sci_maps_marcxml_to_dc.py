@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-import pymarc, sys, unittest
+import copy, pymarc, sys, unittest
 from metadata_converters import SocSciMapsMarcXmlToDc
 from pymarc import MARCReader
 
@@ -38,6 +38,24 @@ class TestSocSciMapsMarcXmlToDc(unittest.TestCase):
             'G4104.C6:2W9 1920z .U5'
         )
 
+    def test_classification_lcc_missing(self):
+        """leave out bf:ClassificationLcc when the linked record has no 929
+
+           use 7641168.mrc (digital) and 3451312.mrc (print), without its
+           929 fields"""
+
+        print_record = copy.deepcopy(self.mrc['3451312'])
+        for f in print_record.get_fields('929'):
+            print_record.remove_field(f)
+
+        metadata = SocSciMapsMarcXmlToDc(
+            self.mrc['7641168'],
+            print_record,
+            'b2dq0kf6d36z'
+        )._asxml()
+        self.assertIsNone(metadata.find('bf:ClassificationLcc', self.ns))
+        self.assertIsNotNone(metadata.find('bf:Local', self.ns))
+
     def test_coordinates(self):
         """get bf:coordinates from the 034 $d $e $f $g
 
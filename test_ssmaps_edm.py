@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import io, os, sys, tempfile, unittest
+from importlib.machinery import SourceFileLoader
+from unittest import mock
+from metadata_converters import FingerprintManifest
+from pymarc import MARCReader
+
+# ssmaps_edm is a script, importing from the modules next to it.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'metadata_converters'))
+ssmaps_edm = SourceFileLoader(
+    'ssmaps_edm',
+    os.path.join(os.path.dirname(__file__), 'metadata_converters', 'ssmaps_edm')
+).load_module()
+
+
+def read_marc_record(path):
+    with open(path, 'rb') as f:
+        return next(MARCReader(f))
+
+
+RECORDS = {
+    '7641168': ('./test_data/7641168.mrc', './test_data/3451312.mrc'),
+    '5999566': ('./test_data/5999566.mrc', './test_data/7368094.mrc'),
+    '11435665': ('./test_data/11435665.mrc', './test_data/7368097.mrc')
+}
+
+
+def get_soc_sci_records(digital_record_id):
+    return tuple(read_marc_record(p) for p in RECORDS[digital_record_id])
+
+
+def tiff_url_fixity(session, url):
+    if 'b0000000000a' in url:
+        raise ValueError('not a TIFF')
+    return {'width': 3000, 'height': 2000, 'bits_per_sample': [8, 8, 8],
+            'samples_per_pixel': 3, 'md5': '0' * 32, 'sha512': '0' * 128,
+            'size': 200000}
+
+
+class TestMarcToEdmSocSciBatch(unittest.TestCase):
+    def setUp(self):
+        patches = (
+            mock.patch.object(ssmaps_edm, 'get_soc_sci_records', get_soc_sci_records),
+            mock.patch.object(ssmaps_edm.fixity_cache, 'tiff_url_fixity', tiff_url_fixity),
+            mock.patch('sys.stderr', new_callable=io.StringIO)
+        )
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_failures(self):
+        """maps that can't be converted should be reported on stderr and
+        left out, without ending the batch or writing to its output."""
+
+        manifest = [
+            '7641168\tb2dq0kf6d36z\n',
+            'no tab\n',
+            '5999566\tb0000000000a\n',
+            '\n',
+            '11435665\tb2vq2sh1x44g\n'
+        ]
+        for format in ('turtle', 'nt'):
+            out = io.StringIO()
+            written, total, failed = ssmaps_edm.marc_to_edm_soc_sci_batch(
+                False, manifest, out, format)
+            self.assertEqual((written, total, failed), (2, 2, 2))
+            self.assertIn('b2dq0kf6d36z', out.getvalue())
+            self.assertIn('b2vq2sh1x44g', out.getvalue())
+            self.assertNotIn('b0000000000a', out.getvalue())
+            self.assertNotIn('trouble', out.getvalue())
+
+        errors = sys.stderr.getvalue()
+        self.assertIn('failed no tab: ValueError', errors)
+        self.assertIn('failed 5999566\tb0000000000a: ValueError: trouble with tiff file', errors)
+
+    def test_fingerprints(self):
+        """maps whose records and TIFF headers haven't changed should be
+        skipped, but still be part of the collection."""
+
+        etags = {'b2dq0kf6d36z': '"1"', 'b2vq2sh1x44g': '"2"'}
+        def head(url, **kwargs):
+            noid = url.split('/')[-2]
+            return mock.Mock(headers={'Content-Length': '200000', 'ETag': etags[noid]})
+
+        manifest = ['7641168\tb2dq0kf6d36z\n', '11435665\tb2vq2sh1x44g\n']
+        with tempfile.TemporaryDirectory() as d, \
+             mock.patch.object(ssmaps_edm.requests, 'head', head):
+            fingerprints = FingerprintManifest(os.path.join(d, 'fingerprints.db'))
+            runs = []
+            for etag in (None, None, '"3"'):
+                if etag:
+                    etags['b2vq2sh1x44g'] = etag
+                out = io.StringIO()
+                runs.append(ssmaps_edm.marc_to_edm_soc_sci_batch(
+                    False, manifest, out, 'nt', fingerprints))
+                # the collection always lists both maps.
+                for noid in etags:
+                    self.assertIn('<ark:/61001/{}>'.format(noid), out.getvalue())
+            fingerprints.close()
+
+        self.assertEqual(runs, [(2, 2, 0), (0, 2, 0), (1, 2, 0)])
+        self.assertNotIn('b2dq0kf6d36z/file.tif', out.getvalue())
+        self.assertIn('b2vq2sh1x44g/file.tif', out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import unittest
+from metadata_converters import TermCache
+from metadata_converters.classes import mix_graph, terms as shared_terms
+from rdflib import Graph, Literal, Namespace, URIRef
+
+EDM = Namespace('http://www.europeana.eu/schemas/edm/')
+
+
+class TestTermCache(unittest.TestCase):
+    def test_shared_terms(self):
+        """identical terms should be built once and shared."""
+
+        terms = TermCache()
+        a = terms.literal('University of Chicago Library')
+        b = terms.literal('University of Chicago Library')
+        self.assertIs(a, b)
+        self.assertEqual(a, Literal('University of Chicago Library'))
+        self.assertIs(terms.term(EDM, 'ProvidedCHO'), terms.term(EDM, 'ProvidedCHO'))
+        self.assertEqual(terms.term(EDM, 'ProvidedCHO'), EDM.ProvidedCHO)
+        self.assertEqual(
+            terms.stats(),
+            {'terms': 2, 'hits': 3, 'misses': 2, 'evictions': 0, 'bytes': terms.bytes}
+        )
+        self.assertGreater(terms.bytes, 0)
+
+    def test_distinct_literals(self):
+        """literals with the same value but different types, datatypes or
+        languages are different terms."""
+
+        terms = TermCache()
+        self.assertNotEqual(terms.literal(1), terms.literal(True))
+        self.assertNotEqual(terms.literal('en'), terms.literal('en', lang='en'))
+        self.assertEqual(terms.stats()['terms'], 4)
+
+    def test_maxsize(self):
+        """a bounded cache evicts the least recently used term."""
+
+        terms = TermCache(maxsize=2)
+        first = terms.uri('ark:/61001/b2dq0kf6d36z/00000001')
+        terms.uri('ark:/61001/b2dq0kf6d36z/00000002')
+        terms.uri('ark:/61001/b2dq0kf6d36z/00000001')
+        terms.uri('ark:/61001/b2dq0kf6d36z/00000003')
+        self.assertEqual(terms.stats()['evictions'], 1)
+        self.assertIs(terms.uri('ark:/61001/b2dq0kf6d36z/00000001'), first)
+        self.assertIsInstance(first, URIRef)
+
+    def test_mix_values_not_cached(self):
+        """technical metadata for an image shouldn't grow the shared cache
+        with values that belong to that image."""
+
+        wbr = URIRef('ark:/61001/b2dq0kf6d36z/file.tif')
+        graph = Graph()
+        mix_graph(graph, wbr, {'width': 3000, 'height': 2000})
+        before = shared_terms.stats()['terms']
+        for width in range(3001, 3011):
+            mix_graph(graph, wbr, {'width': width, 'height': 2000})
+        self.assertEqual(shared_terms.stats()['terms'], before)
+        self.assertIn((wbr, None, Literal(3010)), graph)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import hashlib, io, struct, unittest
+from metadata_converters import SocSciMapsMarcXmlToEDM
+from metadata_converters.classes import MIX, read_tiff_metadata, \
+    stream_tiff_fixity
+from PIL import Image
+from pymarc import MARCReader
+from rdflib import Literal
+
+
+def pil_tiff(mode, size, **kwargs):
+    f = io.BytesIO()
+    Image.new(mode, size).save(f, format='TIFF', **kwargs)
+    f.seek(0)
+    return f
+
+
+def libtiff_layout(strips=20000, values_first=False):
+    """A little endian TIFF laid out the way libtiff writes one: the image
+    data, then the IFD, then its strip offsets and byte counts, then the
+    other values it points to. With values_first, those other values come
+    before the image data instead, where a stream has passed them by the time
+    the IFD is read."""
+    image = bytes(200000)
+    values = struct.pack('<HHH', 8, 8, 8) + struct.pack('<IIII', 400, 1, 400, 1)
+    tags = 10
+    if values_first:
+        values_offset = 32
+        ifd_offset = values_offset + len(values) + len(image)
+        strips_offset = ifd_offset + 2 + tags * 12 + 4
+    else:
+        ifd_offset = 8 + len(image)
+        strips_offset = ifd_offset + 2 + tags * 12 + 4
+        values_offset = strips_offset + strips * 8
+    entries = [
+        (256, 4, 1, 3000), (257, 4, 1, 2000), (258, 3, 3, values_offset),
+        (262, 3, 1, 2), (273, 4, strips, strips_offset), (277, 3, 1, 3),
+        (279, 4, strips, strips_offset + strips * 4),
+        (282, 5, 1, values_offset + 6), (283, 5, 1, values_offset + 14),
+        (296, 3, 1, 2)
+    ]
+    ifd = struct.pack('<H', len(entries))
+    for entry in entries:
+        ifd += struct.pack('<HHII', *entry)
+    ifd += struct.pack('<I', 0)
+    strip_tables = struct.pack('<{}I'.format(strips), *range(strips)) * 2
+    data = b'II' + struct.pack('<HI', 42, ifd_offset)
+    if values_first:
+        return data + bytes(values_offset - 8) + values + image + ifd + strip_tables
+    return data + image + ifd + strip_tables + values
+
+
+def chunked(data, size=4096):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+class TestTiffMetadata(unittest.TestCase):
+    def test_rgb(self):
+        """dimensions, samples, compression and resolution should be read
+        from the header."""
+
+        self.assertEqual(
+            read_tiff_metadata(pil_tiff('RGB', (640, 480), compression='tiff_lzw', dpi=(400, 400))),
+            {
+                'width': 640,
+                'height': 480,
+                'bits_per_sample': [8, 8, 8],
+                'compression': 5,
+                'photometric_interpretation': 2,
+                'samples_per_pixel': 3,
+                'x_resolution': 400.0,
+                'y_resolution': 400.0,
+                'resolution_unit': 2
+            }
+        )
+
+    def test_grayscale(self):
+        """a single sample per pixel, and a tall strip."""
+
+        metadata = read_tiff_metadata(pil_tiff('L', (3, 70000)))
+        self.assertEqual((metadata['width'], metadata['height']), (3, 70000))
+        self.assertEqual(metadata['bits_per_sample'], [8])
+        self.assertEqual(metadata['photometric_interpretation'], 1)
+
+    def test_bigtiff(self):
+        """big endian BigTIFFs should be read too."""
+
+        entries = [(256, 16, 1, 100000), (257, 16, 1, 200000), (258, 3, 1, 16 << 48)]
+        data = b'MM' + struct.pack('>HHHQ', 43, 8, 0, 16) + struct.pack('>Q', len(entries))
+        for entry in entries:
+            data += struct.pack('>HHQQ', *entry)
+        metadata = read_tiff_metadata(io.BytesIO(data))
+        self.assertEqual((metadata['width'], metadata['height']), (100000, 200000))
+        self.assertEqual(metadata['bits_per_sample'], [16])
+
+    def test_not_a_tiff(self):
+        """other files should raise a ValueError."""
+
+        with self.assertRaises(ValueError):
+            read_tiff_metadata(io.BytesIO(b'\x89PNG\r\n\x1a\n'))
+
+    def test_stream(self):
+        """metadata should be read from a TIFF as it streams past, however it
+        is split up, and even if its IFD comes after the image data."""
+
+        data = pil_tiff('RGB', (640, 480), dpi=(400, 400)).getvalue()
+        chunks = (data[i:i + 1000] for i in range(0, len(data), 1000))
+        result = stream_tiff_fixity(chunks, ('md5',))
+        self.assertEqual(result['md5'], hashlib.md5(data).hexdigest())
+        self.assertEqual(result['size'], len(data))
+        self.assertEqual(
+            dict((k, v) for k, v in result.items() if k not in ('md5', 'size')),
+            read_tiff_metadata(io.BytesIO(data))
+        )
+
+        # 200,000 bytes of image data, then an IFD whose bits per sample are
+        # stored just after it.
+        ifd_offset = 8 + 200000
+        entries = [(256, 4, 1, 300), (257, 4, 1, 200), (258, 3, 3, ifd_offset + 2 + 3 * 12 + 4)]
+        data = b'II' + struct.pack('<HI', 42, ifd_offset) + bytes(200000)
+        data += struct.pack('<H', len(entries))
+        for entry in entries:
+            data += struct.pack('<HHII', *entry)
+        data += struct.pack('<I', 0) + struct.pack('<HHH', 16, 16, 16)
+        chunks = (data[i:i + 4096] for i in range(0, len(data), 4096))
+        result = stream_tiff_fixity(chunks)
+        self.assertEqual((result['width'], result['height']), (300, 200))
+        self.assertEqual(result['bits_per_sample'], [16, 16, 16])
+
+    def test_stream_values_after_strips(self):
+        """values stored after a large strip table should be kept while the
+        file streams past."""
+
+        data = libtiff_layout()
+        expected = read_tiff_metadata(io.BytesIO(data))
+        self.assertEqual(expected['x_resolution'], 400.0)
+        result = stream_tiff_fixity(chunked(data), ('md5',))
+        del result['md5'], result['size']
+        self.assertEqual(result, expected)
+
+    def test_stream_values_first(self):
+        """values that went past before the IFD pointed to them should be
+        None, not defaults, unless they can be read some other way."""
+
+        data = libtiff_layout(values_first=True)
+        result = stream_tiff_fixity(chunked(data), ())
+        self.assertIsNone(result['bits_per_sample'])
+        self.assertIsNone(result['x_resolution'])
+        self.assertEqual((result['width'], result['height']), (3000, 2000))
+
+        result = stream_tiff_fixity(chunked(data), (), lambda offset, size: data[offset:offset + size])
+        del result['size']
+        self.assertEqual(result, read_tiff_metadata(io.BytesIO(data)))
+
+    def test_unreadable_values(self):
+        """values an IFD points to past the end of the file should be None."""
+
+        data = libtiff_layout()[:-22]
+        metadata = read_tiff_metadata(io.BytesIO(data))
+        self.assertIsNone(metadata['bits_per_sample'])
+        self.assertIsNone(metadata['x_resolution'])
+        self.assertEqual(metadata['samples_per_pixel'], 3)
+
+    def test_mix(self):
+        """web resources should carry MIX metadata for their images."""
+
+        mrc = []
+        for m in ('7641168', '3451312'):
+            with open('./test_data/{}.mrc'.format(m), 'rb') as fh:
+                mrc.append(next(MARCReader(fh)))
+        metadata = read_tiff_metadata(pil_tiff('RGB', (640, 480), dpi=(400, 400)))
+        metadata.update({'name': 'file.tif', 'sha512': '0', 'size': 1})
+        edm = SocSciMapsMarcXmlToEDM(*mrc, 'b2dq0kf6d36z', [metadata])
+        edm.build_item_triples()
+
+        self.assertEqual(
+            dict((p, o) for p, o in edm.graph.predicate_objects(edm.wbr) if p.startswith(MIX)),
+            {
+                MIX.imageWidth: Literal(640),
+                MIX.imageHeight: Literal(480),
+                MIX.bitsPerSampleValue: Literal('8,8,8'),
+                MIX.samplesPerPixel: Literal(3),
+                MIX.compressionScheme: Literal('Uncompressed'),
+                MIX.colorSpace: Literal('RGB'),
+                MIX.xSamplingFrequency: Literal(400),
+                MIX.ySamplingFrequency: Literal(400),
+                MIX.samplingFrequencyUnit: Literal('in.')
+            }
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
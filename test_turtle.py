@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import unittest
+from metadata_converters import SocSciMapsMarcXmlToEDM
+from metadata_converters.classes import turtle
+from pymarc import MARCReader
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import DC, RDF
+
+
+class TestTurtle(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        mrc = {}
+        for m in ('7641168', '3451312'):
+            with open('./test_data/{}.mrc'.format(m), 'rb') as fh:
+                mrc[m] = next(MARCReader(fh))
+
+        self.edm = SocSciMapsMarcXmlToEDM(
+            mrc['7641168'],
+            mrc['3451312'],
+            'b2dq0kf6d36z',
+            [{'name': 'file.tif', 'sha512': '0', 'size': 1}]
+        )
+        self.edm.build_item_triples()
+
+    def test_round_trip(self):
+        """parsing the Turtle should give back the same triples."""
+
+        self.assertEqual(
+            set(Graph().parse(data=self.edm.triples(), format='turtle', publicID='ark:/61001/')),
+            set(self.edm.graph)
+        )
+
+    def test_deterministic(self):
+        """the same graph should always be written the same way."""
+
+        copy = Graph()
+        for triple in sorted(self.edm.graph, reverse=True):
+            copy.add(triple)
+        for prefix, ns in self.edm.graph.namespaces():
+            copy.bind(prefix, ns)
+        self.assertEqual(turtle(copy, 'ark:/61001/'), self.edm.triples())
+
+    def test_relative(self):
+        """URIs under the base should only be written relative to it when
+        they resolve back to themselves."""
+
+        graph = Graph()
+        for uri, written in (
+            ('ark:/61001/b2dq0kf6d36z', '<b2dq0kf6d36z>'),
+            ('ark:/61001/b2dq0kf6d36z/file.tif', '<b2dq0kf6d36z/file.tif>'),
+            ('ark:/61001/b2dq/a:b', '<b2dq/a:b>'),
+            ('ark:/61001/a:b', '<ark:/61001/a:b>'),
+            ('ark:/61001//b2dq0kf6d36z', '<ark:/61001//b2dq0kf6d36z>'),
+            ('ark:/61001/../b2dq0kf6d36z', '<ark:/61001/../b2dq0kf6d36z>'),
+            ('ark:/61001/b2dq/./file.tif', '<ark:/61001/b2dq/./file.tif>')
+        ):
+            graph.add((URIRef(uri), DC.title, Literal('a')))
+            self.assertIn('\n{} '.format(written), turtle(graph, 'ark:/61001/'))
+        self.assertEqual(
+            set(Graph().parse(data=turtle(graph, 'ark:/61001/'), format='turtle')),
+            set(graph)
+        )
+
+    def test_shape(self):
+        """bound prefixes, the base and rdf:type shorthand are used, and
+           literals are escaped."""
+
+        graph = Graph()
+        graph.bind('dc', DC)
+        graph.add((URIRef('ark:/61001/b2dq0kf6d36z'), RDF.type, URIRef('http://example.org/Map')))
+        graph.add((URIRef('ark:/61001/b2dq0kf6d36z'), DC.title, Literal('a "b"\nc')))
+        graph.add((URIRef('ark:/61001/b2dq0kf6d36z'), DC.title, Literal('a')))
+        self.assertEqual(
+            turtle(graph, 'ark:/61001/'),
+            '@base <ark:/61001/> .\n'
+            '@prefix dc: <http://purl.org/dc/elements/1.1/> .\n'
+            '\n'
+            '<b2dq0kf6d36z> a <http://example.org/Map> ;\n'
+            '    dc:title "a \\"b\\"\\nc",\n'
+            '        "a" .\n'
+            '\n'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import gzip, http.server, io, os, requests, tempfile, threading, unittest
+from metadata_converters import SocSciMapsMarcXmlToEDM
+from metadata_converters.upload_to_marklogic import iter_chunks, \
+    iter_turtle_chunks, MarkLogicUploader
+from pymarc import MARCReader
+from rdflib import Graph
+
+
+class StubGraphStore(http.server.ThreadingHTTPServer):
+    """A local stand in for MarkLogic's /v1/graphs endpoint. It records the
+    requests it receives, and answers the first few with 503."""
+
+    def __init__(self, failures=0):
+        super().__init__(('127.0.0.1', 0), StubGraphStoreHandler)
+        self.failures = failures
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/v1/graphs'.format(self.server_address[1])
+
+
+class StubGraphStoreHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            if self.server.failures:
+                self.server.failures -= 1
+                self.send_response(503)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if self.headers.get('Content-Encoding') == 'gzip':
+                data = gzip.decompress(data)
+            self.server.requests.append(
+                (self.command, self.path, self.headers['Content-Type'], data))
+        self.send_response(204)
+        self.end_headers()
+
+    do_DELETE = do_POST
+
+
+class TestUploadToMarkLogic(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.graph = Graph()
+        self.turtle = ''
+        for d, p in (('7641168', '3451312'), ('5999566', '7368094')):
+            mrc = []
+            for m in (d, p):
+                with open('./test_data/{}.mrc'.format(m), 'rb') as fh:
+                    mrc.append(next(MARCReader(fh)))
+            edm = SocSciMapsMarcXmlToEDM(*mrc, d, [])
+            edm.build_item_triples()
+            self.graph += edm.graph
+            self.turtle += edm.triples()
+
+    def upload(self, server, paths, **kwargs):
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            uploader = MarkLogicUploader(
+                server.url, 'socscimaps', workers=3, backoff=0.01, **kwargs)
+            metrics = uploader.upload(iter_chunks(paths, 512))
+            uploader.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        return metrics
+
+    def test_turtle_chunks(self):
+        """every chunk of Turtle should parse on its own, and together they
+        should hold the whole graph."""
+
+        chunks = list(iter_turtle_chunks(io.BytesIO(self.turtle.encode('utf-8')), 512))
+        self.assertGreater(len(chunks), 1)
+        graph = Graph()
+        for chunk in chunks:
+            graph.parse(data=chunk, format='turtle')
+        self.assertEqual(set(graph), set(self.graph))
+
+    def test_upload(self):
+        """chunks should be POSTed to the collection's graph, gzipped, and
+        retried when the server is unavailable."""
+
+        with tempfile.TemporaryDirectory() as d:
+            paths = [os.path.join(d, 'socscimaps.ttl'), os.path.join(d, 'socscimaps.nt')]
+            with open(paths[0], 'w', encoding='utf-8') as f:
+                f.write(self.turtle)
+            self.graph.serialize(destination=paths[1], format='nt')
+
+            server = StubGraphStore(failures=2)
+            metrics = self.upload(server, paths)
+
+        self.assertEqual(metrics['retries'], 2)
+        self.assertEqual(metrics['chunks'], len(server.requests))
+        self.assertGreater(metrics['chunks'], 2)
+        self.assertLess(metrics['sent_bytes'], metrics['bytes'])
+
+        graphs = {'text/turtle': Graph(), 'application/n-triples': Graph()}
+        for method, path, content_type, data in server.requests:
+            self.assertEqual((method, path), ('POST', '/v1/graphs?graph=socscimaps'))
+            graphs[content_type].parse(
+                data=data, format='nt' if content_type == 'application/n-triples' else 'turtle')
+        for graph in graphs.values():
+            self.assertEqual(set(graph), set(self.graph))
+
+    def test_failure(self):
+        """an upload should fail once a chunk runs out of retries."""
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'socscimaps.ttl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.turtle)
+
+            server = StubGraphStore(failures=100)
+            with self.assertRaises(requests.HTTPError):
+                self.upload(server, [path], retries=1)
+
+
+if __name__ == '__main__':
+    unittest.main()